@@ -1,14 +1,45 @@
 import math
-import random
-from scipy import integrate
-from arcs import CircularArc, EllipticalArc
+import copy
+import numpy as np
+from multiprocessing import Pool, current_process
+from arcs import CircularArc, EllipticalArc, ellipseArcLength
+from arc_set import ArcSet
+from spatial_grid import SpatialGrid
+from distance_field import DistanceField
+from metrics import Metrics
 
 
 class ArcGenerator():
-    def __init__(self, width = 1600, height = 1600):
+    def __init__(self, width = 1600, height = 1600, batchSize = 1, seed = None, placement = "pairwise"):
         self.width = width
         self.height = height
 
+        # Geometry stream, an int seed or a numpy Generator such as RandomStreams.geometry
+        self.rng = np.random.default_rng(seed)
+
+        # Number of random positions tested together per placement attempt, 1 tests them one at a time
+        self.batchSize = batchSize
+
+        # "pairwise" checks candidates against nearby arcs, "field" against a distance field of everything placed
+        # whose cells are fieldResolution pixels wide, "parallel" places pairwise in separate regions on placementWorkers processes
+        if placement not in ["pairwise", "field", "parallel"]:
+            raise Exception("Invalid placement")
+        self.placement = placement
+        self.fieldResolution = 1
+        self.placementWorkers = 1
+
+        # Processes for parallel placement, started on first use and kept for later placeArcs calls
+        # Callers placing many images can share one pool between their generators instead
+        self.placementPool = None
+        self.distanceField = None
+        self.placementReport = None
+
+        # Stage timings and counters of the last generateArcs, for profiling slow runs
+        self.metrics = Metrics()
+
+        # Line widths are turned into pixels at this dpi for the bounds check, the same as the image is drawn with
+        self.dpi = 100
+
     def parseInfo(self, inputs):
         parsedInputs = []
 
@@ -23,119 +54,456 @@ class ArcGenerator():
 
         return parsedInputs
 
-    def placeArcs(self, toPrint = False):
-        # List of finalized arcs
+    def createGrid(self):
+        # Cells about the size of a typical arc keep each lookup to a handful of buckets
+        if self.arcs:
+            boxes = [arc.getBoundingBox() for arc in self.arcs]
+            cellSize = sum(max(box[2] - box[0], box[3] - box[1]) for box in boxes) / len(boxes)
+        else:
+            cellSize = 1
+        return SpatialGrid(cellSize + self.getSearchMargin())
+
+    def getSearchMargin(self):
+        # Arcs whose boxes are further apart than this can never fail the minDist check
+        return max(self.minDist, 0) + 1
+
+    def getDistance(self, finishedArc, arc):
+        self.metrics.count("distances")
+        # floor(d) < minDist is the same test as d < ceil(minDist), so the search can stop at that threshold
+        # Near the threshold the search can also stop within its tolerance, so the lower end of the
+        # returned range is what is compared, arcs are only accepted when they are certainly far enough apart
+        distance, error = finishedArc.boundedMinimumDistance(arc, threshold = math.ceil(self.minDist))
+        return distance - error
+
+    def getNeighbours(self, arc, grid):
+        return grid.query(arc.getBoundingBox(self.getSearchMargin()))
+
+    def getSamples(self, arc):
+        # One sample per pixel of length as an (n, 2) array, with the largest gap between neighbouring samples
+        # and the search box, worked out once when the arc is accepted instead of on every batch that meets it
+        _, xs, ys = arc.samplePoints(max(int(arc.length), 2), arc.theta1, arc.theta2)
+        return np.column_stack((xs, ys)), float(np.max(np.hypot(np.diff(xs), np.diff(ys)))), arc.getBoundingBox(self.getSearchMargin())
+
+    def placeArcPairwise(self, arc, grid):
+        # Positions put the middle of the arc on a free part of the canvas and are tested one at a time
+        # They are drawn and screened 16 at a time, a sample in a cell below the free minimum is certainly too close,
+        # which rules out most positions on a full canvas before any distance check
+        minimum = self.getFreeMinimum()
+        divisions = self.getFieldDivisions(arc)
+        attempts = 0
+
+        while attempts <= 100:
+            centers, theta1s = self.getFreePositions(arc, min(16, 101 - attempts), minimum)
+            if len(centers) == 0:
+                # Nowhere left on the canvas for the middle of an arc
+                return False
+
+            boxes = arc.getBoundingBoxes(centers, theta1s, arc.getStrokeMargin(self.dpi))
+            xs, ys = arc.getCandidatePoints(centers, theta1s, divisions)
+            possible = (boxes[:, 0] >= 0) & (boxes[:, 1] >= 0) & (boxes[:, 2] <= self.width) & (boxes[:, 3] <= self.height) & (self.distanceField.query(xs, ys) >= minimum)
+
+            for k in range(len(centers)):
+                attempts += 1
+                self.attempts += 1
+                if not possible[k]:
+                    continue
+
+                # Only arcs whose boxes overlap this one are close enough to need a distance check
+                arc.setPositioning(centers[k], theta1s[k])
+                if not any(math.floor(self.getDistance(finishedArc, arc)) < self.minDist for finishedArc in self.getNeighbours(arc, grid)):
+                    return True
+
+        return False
+
+    def placeArcBatched(self, arc, grid, samples, batchSize):
+        # scipy is only loaded once batched placement is used
+        from scipy.spatial import cKDTree
+
+        divisions = max(int(arc.length), 2)
+        threshold = math.ceil(self.minDist)
+        attempts = 0
+
+        # Same budget of random positions as the one at a time loop
+        while attempts <= 100:
+            count = min(batchSize, 101 - attempts)
+
+            centers, theta1s = self.getFreePositions(arc, count, self.getFreeMinimum())
+            if len(centers) == 0:
+                return False
+            attempts += count
+            self.attempts += count
+
+            xs, ys = arc.getCandidatePoints(centers, theta1s, divisions)
+
+            # Bounds check for every candidate at once, from the tight box of each
+            boxes = arc.getBoundingBoxes(centers, theta1s, arc.getStrokeMargin(self.dpi))
+            inBounds = np.flatnonzero((boxes[:, 0] >= 0) & (boxes[:, 1] >= 0) & (boxes[:, 2] <= self.width) & (boxes[:, 3] <= self.height))
+            if len(inBounds) == 0:
+                continue
+
+            # One grid query covering every candidate, then each candidate's neighbours are the arcs its own box overlaps
+            # Search boxes overlap exactly when the arcs' boxes are within the search margin, the same as getNeighbours
+            searchBoxes = arc.getBoundingBoxes(centers, theta1s)[inBounds]
+            margin = self.getSearchMargin()
+            nearby = grid.query((searchBoxes[:, 0].min() - margin, searchBoxes[:, 1].min() - margin, searchBoxes[:, 2].max() + margin, searchBoxes[:, 3].max() + margin))
+            if nearby:
+                nearbyBoxes = np.array([samples[id(finishedArc)][2] for finishedArc in nearby])
+                overlaps = (searchBoxes[:, None, 0] <= nearbyBoxes[None, :, 2]) & (nearbyBoxes[None, :, 0] <= searchBoxes[:, None, 2]) & (searchBoxes[:, None, 1] <= nearbyBoxes[None, :, 3]) & (nearbyBoxes[None, :, 1] <= searchBoxes[:, None, 3])
+
+                # The first candidate without neighbours is accepted, so the ones after it never need checking
+                free = np.flatnonzero(~overlaps.any(axis=1))
+                if len(free):
+                    inBounds, overlaps = inBounds[:free[0] + 1], overlaps[:free[0] + 1]
+                neighbours = [[nearby[m] for m in np.flatnonzero(row)] for row in overlaps]
+                nearby = [nearby[m] for m in np.flatnonzero(overlaps.any(axis=0))]
+            if not nearby:
+                arc.setPositioning(centers[inBounds[0]], theta1s[inBounds[0]])
+                return True
+
+            # Nearest sampled point of any nearby arc, for every sample of every candidate in one query
+            nearbyPoints = np.concatenate([samples[id(finishedArc)][0] for finishedArc in nearby])
+            nearbyGap = max(samples[id(finishedArc)][1] for finishedArc in nearby)
+            points = np.stack((xs[inBounds], ys[inBounds]), axis=-1)
+            self.metrics.count("sampledScreens", len(inBounds))
+            distances = cKDTree(nearbyPoints).query(points.reshape(-1, 2))[0].reshape(len(inBounds), divisions).min(axis=1)
+
+            # Sampled distances can overestimate the true distance by at most the gaps between samples
+            gaps = np.max(np.hypot(np.diff(xs[inBounds], axis=1), np.diff(ys[inBounds], axis=1)), axis=1)
+
+            for n, k in enumerate(inBounds):
+                if neighbours[n] and distances[n] < threshold:
+                    continue
+
+                arc.setPositioning(centers[k], theta1s[k])
+                if not neighbours[n] or distances[n] - gaps[n] - nearbyGap >= threshold:
+                    return True
+
+                # Too close to call from samples, so fall back to the full distance check
+                if not any(math.floor(self.getDistance(finishedArc, arc)) < self.minDist for finishedArc in neighbours[n]):
+                    return True
+
+        return False
+
+    def getFieldDivisions(self, arc):
+        # Enough samples that neighbouring ones are never more than one cell apart
+        return max(math.ceil(arc.getMaxSpeed() * (arc.theta2 - arc.theta1) / self.distanceField.resolution) + 1, 2)
+
+    def getFreeMinimum(self):
+        # Field value of a cell that may still hold a point far enough from every placed arc
+        # The field is never below the true distance, and a point is at most the cell error from its cell center
+        return math.ceil(self.minDist) - self.distanceField.getError()
+
+    def getFreePositions(self, arc, count, minimum):
+        # Instead of uniform centers, put the middle of the arc on a random free cell of the distance field
+        # so candidates come from what is left of the canvas however full it gets
+        points = self.distanceField.sampleFree(self.rng, count, minimum)
+        theta1s = self.rng.random(len(points))*2*math.pi
+        middles = theta1s + (arc.theta2 - arc.theta1) / 2
+
+        c, s = np.cos(middles), np.sin(middles)
+        r = (arc.a * arc.b) / np.sqrt((arc.b * c)**2 + (arc.a * s)**2)
+        centers = points - np.column_stack((r * np.cos(middles + arc.angle), r * np.sin(middles + arc.angle)))
+        return centers.tolist(), theta1s.tolist()
+
+    def placeArcField(self, arc, batchSize):
+        # Check candidates against the distance field, the cost does not grow with the number of placed arcs
+        # Distances read from the field can be too large by the cell error plus half a sample gap on each arc,
+        # so candidates are only accepted once that slack is taken off, which can reject some that would fit
+        field = self.distanceField
+        threshold = math.ceil(self.minDist)
+        slack = field.getError() + field.resolution
+        divisions = self.getFieldDivisions(arc)
+        attempts = 0
+
+        while attempts <= 100:
+            count = min(batchSize, 101 - attempts)
+
+            centers, theta1s = self.getFreePositions(arc, count, threshold + slack)
+            if len(centers) == 0:
+                # Nowhere left on the canvas for any part of an arc
+                return False
+            attempts += count
+            self.attempts += count
+
+            boxes = arc.getBoundingBoxes(centers, theta1s, arc.getStrokeMargin(self.dpi))
+            inBounds = np.flatnonzero((boxes[:, 0] >= 0) & (boxes[:, 1] >= 0) & (boxes[:, 2] <= self.width) & (boxes[:, 3] <= self.height))
+            if len(inBounds) == 0:
+                continue
+
+            # Negative or zero separations allow touching, so any position on the canvas will do
+            if threshold > 0:
+                xs, ys = arc.getCandidatePoints([centers[k] for k in inBounds], [theta1s[k] for k in inBounds], divisions)
+                self.metrics.count("fieldQueries", len(inBounds))
+                inBounds = inBounds[field.query(xs, ys) - slack >= threshold]
+                if len(inBounds) == 0:
+                    continue
+
+            arc.setPositioning(centers[inBounds[0]], theta1s[inBounds[0]])
+            return True
+
+        return False
+
+    def insertField(self, arc):
+        # Only cells that a later candidate could be too close to need updating
+        _, xs, ys = arc.samplePoints(self.getFieldDivisions(arc), arc.theta1, arc.theta2)
+        field = self.distanceField
+        field.insert(xs, ys, math.ceil(self.minDist) + field.getError() + field.resolution)
+
+    def getRegions(self):
+        # Square regions a bit wider than the largest arc, each with its phase in a 2x2 checkerboard
+        # Arcs may reach past their region by spill, which still leaves a full margin between regions of the same phase
+        margin = math.ceil(max(self.minDist, 0)) + 1
+        size = max(max(box[2] - box[0], box[3] - box[1]) for box in (arc.getBoundingBox() for arc in self.arcs)) + margin
+        spill = (size - margin) / 2
+
+        regions = []
+        for j in range(math.ceil(self.height / size)):
+            for i in range(math.ceil(self.width / size)):
+                box = (i*size - spill, j*size - spill, min((i + 1)*size, self.width) + spill, min((j + 1)*size, self.height) + spill)
+                regions.append(((i % 2) + 2*(j % 2), box))
+        return regions, margin
+
+    def placeArcsParallel(self):
+        # Regions of one phase can't affect each other, so each phase is placed concurrently
+        # and sees every arc placed in the phases before it
+        if not self.arcs:
+            return []
+        regions, margin = self.getRegions()
+        seeds = np.random.SeedSequence(int(self.rng.integers(2**63))).spawn(len(regions))
+
+        # Arcs are dealt out to the regions in turn, so every part of the canvas gets a share of each size
+        shares = [list(range(k, len(self.arcs), len(regions))) for k in range(len(regions))]
+
+        # A lightweight copy carries the settings to the workers, without the arcs
+        settings = copy.copy(self)
+        settings.arcs, settings.arcSet, settings.distanceField, settings.metrics, settings.placementPool = [], None, None, Metrics(), None
+
+        pool = self.getPlacementPool()
         finishedArcs = []
+        grid = SpatialGrid(regions[0][1][2] - regions[0][1][0])
+
+        for phase in range(4):
+            tasks = []
+            for k, (regionPhase, box) in enumerate(regions):
+                if regionPhase != phase or not shares[k]:
+                    continue
+                nearby = grid.query((box[0] - margin, box[1] - margin, box[2] + margin, box[3] + margin))
+                tasks.append((settings, box, [self.arcs[i] for i in shares[k]], nearby, seeds[k]))
+
+            results = pool.map(placeRegion, tasks) if pool else map(placeRegion, tasks)
+            for task, (positions, attempts, counts) in zip(tasks, results):
+                self.attempts += attempts
+                for name, amount in counts.items():
+                    self.metrics.count(name, amount)
+                for n, center, theta1 in positions:
+                    arc = task[2][n]
+                    arc.setPositioning(center, theta1)
+                    finishedArcs.append(arc)
+                    grid.insert(arc, arc.getBoundingBox())
 
-        for i, arc in enumerate(self.arcs):
-            count = 0
+        return finishedArcs
 
-            # Any time arc is invalid, recreate it
-            while arc.fastOutOfBounds() or any([False] + [math.floor(finishedArc.fastMinimumDistance(arc))<self.minDist for finishedArc in finishedArcs]):
-                arc.randomizePositioning()
+    def getPlacementPool(self):
+        # Worker processes of a batch can't start their own pool, so they place the regions themselves
+        if self.placementPool is None and self.placementWorkers > 1 and not current_process().daemon:
+            self.placementPool = Pool(self.placementWorkers)
+        return self.placementPool
 
-                count += 1
-                if count > 100:
-                    break
-            else:
+    def close(self):
+        # Stop the placement pool the generator started, a shared pool is closed by whoever made it instead
+        if self.placementPool is not None:
+            self.placementPool.close()
+            self.placementPool.join()
+            self.placementPool = None
+
+    def placeArcs(self, toPrint = False, batchSize = None):
+        batchSize = batchSize or self.batchSize
+
+        # List of finalized arcs
+        finishedArcs = []
+        grid = self.createGrid()
+        samples = {}
+
+        # Candidate positions tested, across every arc
+        self.attempts = 0
+
+        if self.placement == "field":
+            self.distanceField = DistanceField(self.width, self.height, self.fieldResolution)
+        elif self.placement == "pairwise":
+            # Here the field only proposes where to try, the pairwise check decides, so cells can be coarse
+            self.distanceField = DistanceField(self.width, self.height, max(math.ceil(self.minDist), 4) / 2)
+
+        if self.placement == "parallel":
+            finishedArcs = self.placeArcsParallel()
+
+        for i, arc in enumerate(self.arcs if self.placement != "parallel" else []):
+            if self.placement == "field":
+                if self.placeArcField(arc, batchSize):
+                    finishedArcs.append(arc)
+                    self.insertField(arc)
+                continue
+
+            if batchSize > 1:
+                if self.placeArcBatched(arc, grid, samples, batchSize):
+                    finishedArcs.append(arc)
+                    grid.insert(arc, arc.getBoundingBox())
+                    samples[id(arc)] = self.getSamples(arc)
+                    self.insertField(arc)
+                continue
+
+            if self.placeArcPairwise(arc, grid):
                 finishedArcs.append(arc)
+                grid.insert(arc, arc.getBoundingBox())
+                self.insertField(arc)
+
+        # Arcs that found no place are left out of the layout, the report says how many and what it cost
+        self.placementReport = {"placed": len(finishedArcs), "dropped": len(self.arcs) - len(finishedArcs), "attempts": self.attempts}
+        for name, amount in self.placementReport.items():
+            self.metrics.count(name, amount)
+
+        # The finished layout is kept as arrays, per arc objects are only views into them
+        # Placement itself moves plain Arc objects, whose attribute access is cheaper in the retry loops
+        self.arcSet = ArcSet.fromArcs(finishedArcs, self.width, self.height, self.rng)
+        self.arcs = list(self.arcSet)
 
         if toPrint:
-            for arc in finishedArcs:
+            for arc in self.arcs:
                 print(arc.printShape())
+            print("Placed {placed}, dropped {dropped}, {attempts} positions tried".format(**self.placementReport))
         
-        self.arcs = finishedArcs
-        return finishedArcs
+        return self.arcs
+
+
+def placeRegion(task):
+    # Place arcs one at a time inside a region, run in a worker process for parallel placement
+    # Returns (arc number, center, theta1) of every arc that was placed, the positions tried and the counters
+    generator, (xmin, ymin, xmax, ymax), arcs, nearby, seed = task
+    generator.metrics = Metrics()
+    rng = np.random.default_rng(seed)
+    grid = SpatialGrid(xmax - xmin)
+    for arc in nearby:
+        grid.insert(arc, arc.getBoundingBox())
+
+    positions = []
+    attempts = 0
+    for n, arc in enumerate(arcs):
+        for count in range(101):
+            attempts += 1
+
+            # The arc's box has to stay inside the region, which limits where its center can go
+            theta1 = rng.random()*2*math.pi
+            arc.setPositioning((0, 0), theta1)
+            box = arc.getBoundingBox()
+            low, high = (math.ceil(xmin - box[0]), math.ceil(ymin - box[1])), (math.floor(xmax - box[2]), math.floor(ymax - box[3]))
+            if low[0] > high[0] or low[1] > high[1]:
+                continue
+
+            arc.setPositioning((int(rng.integers(low[0], high[0], endpoint = True)), int(rng.integers(low[1], high[1], endpoint = True))), theta1)
+            if arc.fastOutOfBounds(generator.dpi) or any(math.floor(generator.getDistance(finishedArc, arc)) < generator.minDist for finishedArc in generator.getNeighbours(arc, grid)):
+                continue
+
+            positions.append((n, tuple(arc.center), theta1))
+            grid.insert(arc, arc.getBoundingBox())
+            break
+
+    return positions, attempts, generator.metrics.counts
 
 
 class EllipticalArcGenerator(ArcGenerator):
-    def __init__(self, eccentricity, length, angle, minDist, width, height):
+    def __init__(self, eccentricity, length, angle, minDist, width, height, batchSize = 1, seed = None, placement = "pairwise"):
         self.minDist = minDist
         self.eccentricity = eccentricity
         self.length = length
         self.angle = angle
-        super().__init__(width, height)
+        super().__init__(width, height, batchSize, seed, placement)
 
     def createArc(self, eccentricity, length, angle):
         # Calculate b/a using e = sqrt(1-b^2/a^2)
         axisRatio = math.sqrt(1 - eccentricity**2)
 
         # Initialize start angle randomly
-        theta1 = random.random()*2*math.pi
+        theta1 = self.rng.random()*2*math.pi
 
         # Make end angle so arc is between 30 and 330 degrees
-        theta2 = theta1 + random.random()*5/3*math.pi + math.pi/6
-
-        # Integral formula for arc length
-        def integrand(theta,a,b):
-            return math.sqrt((a**2)*(math.sin(theta)**2) + (b**2)*(math.cos(theta)**2))
+        theta2 = theta1 + self.rng.random()*5/3*math.pi + math.pi/6
 
         # Initialize axis in correct ratio 
         a = 1
         b = 1*axisRatio
 
         # Calculate arcLength
-        arcLengthIntegral = integrate.quad(integrand, theta1, theta2, args=(a,b))
-        arcLength = arcLengthIntegral[0]
+        arcLength = ellipseArcLength(a, b, theta1, theta2)
+        self.metrics.count("arcLengths")
 
         # Scale axes to correct size
         a *= length / arcLength
         b *= length / arcLength
 
-        arc = EllipticalArc(a, b, theta1, theta2, angle, width = self.width, height = self.height, length = length)
+        arc = EllipticalArc(a, b, theta1, theta2, angle, width = self.width, height = self.height, length = length, rng = self.rng)
         return arc
 
     def generateArcs(self, amount = 1):
         self.eccentricity, self.length, self.angle = self.parseInfo([self.eccentricity, self.length, self.angle])
         amount = int(amount)
         self.arcs = []
+        self.metrics = Metrics()
 
         # Create arcs using parameters specified
-        for i in range(amount):
-            # Choose random value within each parameters range
-            arcLength = random.random()*(self.length[1] - self.length[0]) + self.length[0]
-            arcEccentricity = random.random()*(self.eccentricity[1] - self.eccentricity[0]) + self.eccentricity[0]
-            arcAngle = random.random()*(self.angle[1] - self.angle[0]) + self.angle[0]
-
-            # Create the arc
-            self.arcs.append(self.createArc(eccentricity = arcEccentricity, length = arcLength, angle = arcAngle))
-
-        self.placeArcs()
+        with self.metrics.stage("create"):
+            for i in range(amount):
+                # Choose random value within each parameters range
+                arcLength = self.rng.random()*(self.length[1] - self.length[0]) + self.length[0]
+                arcEccentricity = self.rng.random()*(self.eccentricity[1] - self.eccentricity[0]) + self.eccentricity[0]
+                arcAngle = self.rng.random()*(self.angle[1] - self.angle[0]) + self.angle[0]
+
+                # Create the arc
+                self.arcs.append(self.createArc(eccentricity = arcEccentricity, length = arcLength, angle = arcAngle))
+
+        with self.metrics.stage("place"):
+            self.placeArcs()
         return self.arcs
 
 
 class CircularArcGenerator(ArcGenerator):
-    def __init__(self, curvature, length, minDist, width, height):
+    def __init__(self, curvature, length, minDist, width, height, batchSize = 1, seed = None, placement = "pairwise"):
         self.minDist = minDist
         self.curvature = curvature
         self.length = length
-        super().__init__(width, height)
+        super().__init__(width, height, batchSize, seed, placement)
+
+    def getDistance(self, finishedArc, arc):
+        self.metrics.count("distances")
+        # Circular arcs have a closed form distance, so no iterative refinement is needed
+        return finishedArc.exactMinimumDistance(arc)
 
     def createArc(self, curvature, length):
         radius = 1/curvature
         circumference = 2*math.pi*radius
         
-        theta1 = random.random()*2*math.pi
+        theta1 = self.rng.random()*2*math.pi
         # Calculate end angle to ensure correct arc length
         theta2 = theta1 + 2*math.pi * (length/circumference) 
 
-        arc = CircularArc(radius, theta1, theta2, width = self.width, height = self.height, length = length)
+        arc = CircularArc(radius, theta1, theta2, width = self.width, height = self.height, length = length, rng = self.rng)
         return arc
 
     def generateArcs(self, amount = 1):
         self.length, self.curvature = self.parseInfo([self.length, self.curvature])
         amount = int(amount)
         self.arcs = []
+        self.metrics = Metrics()
 
         # Create arcs using parameters specified
-        for i in range(amount):
-            # Choose random value within each parameters range
-            arcCurve = random.random()*(self.curvature[1] - self.curvature[0]) + self.curvature[0]
-            arcLength = random.random()*(self.length[1] - self.length[0]) + self.length[0]
+        with self.metrics.stage("create"):
+            for i in range(amount):
+                # Choose random value within each parameters range
+                arcCurve = self.rng.random()*(self.curvature[1] - self.curvature[0]) + self.curvature[0]
+                arcLength = self.rng.random()*(self.length[1] - self.length[0]) + self.length[0]
 
-            # Create the arc
-            self.arcs.append(self.createArc(curvature = arcCurve, length = arcLength))
+                # Create the arc
+                self.arcs.append(self.createArc(curvature = arcCurve, length = arcLength))
 
-        self.placeArcs()
+        with self.metrics.stage("place"):
+            self.placeArcs()
 
 
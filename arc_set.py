@@ -0,0 +1,148 @@
+import numpy as np
+from arcs import ArcGeometry, CircularArc, CircularArcGeometry, EllipticalArc, EllipticalArcGeometry, Point
+
+
+class ArcSet():
+    # A whole layout as parallel arrays, one entry per arc
+    fields = ["a", "b", "theta1", "theta2", "rotation", "cx", "cy", "length", "lw", "comX", "comY"]
+
+    def __init__(self, count = 0, width = 1600, height = 1600, color = (0,0,0), rng = None):
+        self.width = width
+        self.height = height
+        self.color = color
+        self.rng = np.random.default_rng(rng)
+
+        for field in self.fields:
+            setattr(self, field, np.zeros(count, dtype=np.float64))
+        self.circular = np.zeros(count, dtype=bool)
+
+    @classmethod
+    def fromArcs(cls, arcs, width = 1600, height = 1600, rng = None):
+        # Works with Arc objects or views of another ArcSet
+        arcs = list(arcs)
+        if rng is None and arcs:
+            rng = arcs[0].rng
+        arcSet = cls(len(arcs), width, height, arcs[0].color if arcs else (0,0,0), rng)
+
+        for i, arc in enumerate(arcs):
+            arcSet.a[i], arcSet.b[i] = arc.a, arc.b
+            arcSet.theta1[i], arcSet.theta2[i], arcSet.rotation[i] = arc.theta1, arc.theta2, arc.angle
+            arcSet.cx[i], arcSet.cy[i] = arc.center
+            arcSet.length[i], arcSet.lw[i] = arc.length, arc.lw
+            arcSet.comX[i], arcSet.comY[i] = arc.centerOfMass
+            arcSet.circular[i] = arc.type == "Circular Arc"
+
+        return arcSet
+
+    def select(self, indices):
+        # New ArcSet holding copies of the chosen rows
+        arcSet = ArcSet(0, self.width, self.height, self.color, self.rng)
+        for field in self.fields + ["circular"]:
+            setattr(arcSet, field, getattr(self, field)[indices].copy())
+        return arcSet
+
+    def toArcs(self):
+        # Full Arc objects, for code that needs to keep them beyond the set
+        return [view.toArc() for view in self]
+
+    def __len__(self):
+        return len(self.a)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("ArcSet index out of range")
+        return CircularArcView(self, index) if self.circular[index] else EllipticalArcView(self, index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+def viewField(name):
+    # Property reading and writing one entry of an ArcSet array
+    def get(self):
+        return float(getattr(self.arcSet, name)[self.index])
+
+    def set(self, value):
+        getattr(self.arcSet, name)[self.index] = value
+
+    return property(get, set)
+
+
+class ArcView(ArcGeometry):
+    # Lightweight per arc object over one row of an ArcSet, sharing the geometry methods of Arc
+    __slots__ = ("arcSet", "index")
+
+    def __init__(self, arcSet, index):
+        self.arcSet = arcSet
+        self.index = index
+
+    a = viewField("a")
+    b = viewField("b")
+    theta1 = viewField("theta1")
+    theta2 = viewField("theta2")
+    angle = viewField("rotation")
+    length = viewField("length")
+    lw = viewField("lw")
+
+    @property
+    def center(self):
+        return Point(float(self.arcSet.cx[self.index]), float(self.arcSet.cy[self.index]))
+
+    @center.setter
+    def center(self, center):
+        self.arcSet.cx[self.index], self.arcSet.cy[self.index] = center
+
+    @property
+    def centerOfMass(self):
+        return Point(float(self.arcSet.comX[self.index]), float(self.arcSet.comY[self.index]))
+
+    @property
+    def width(self):
+        return self.arcSet.width
+
+    @property
+    def height(self):
+        return self.arcSet.height
+
+    @property
+    def color(self):
+        return self.arcSet.color
+
+    @property
+    def rng(self):
+        return self.arcSet.rng
+
+    @property
+    def ellipse(self):
+        import sympy
+        return sympy.Ellipse(sympy.Point(self.center), self.a, self.b)
+
+    def setEllipse(self):
+        # Views never cache the sympy ellipse
+        pass
+
+    def __eq__(self, other):
+        return isinstance(other, ArcView) and self.arcSet is other.arcSet and self.index == other.index
+
+    def __hash__(self):
+        return hash((id(self.arcSet), self.index))
+
+
+class EllipticalArcView(EllipticalArcGeometry, ArcView):
+    __slots__ = ()
+    type = "Elliptical Arc"
+
+    def toArc(self):
+        return EllipticalArc(self.a, self.b, self.theta1, self.theta2, self.angle, self.center, self.lw, self.color, self.width, self.height, self.length, self.rng)
+
+
+class CircularArcView(CircularArcGeometry, ArcView):
+    __slots__ = ()
+    type = "Circular Arc"
+    radius = viewField("a")
+
+    def toArc(self):
+        return CircularArc(self.radius, self.theta1, self.theta2, self.center, self.angle, self.lw, self.color, self.width, self.height, self.length, self.rng)
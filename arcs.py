@@ -1,67 +1,133 @@
 import math
-import random
-import sympy
-from scipy.spatial  import distance
-from scipy import integrate
+import heapq
+import functools
 import numpy as np
-import time
-import matplotlib
-
-class Arc():
-    def __init__(self, a, b, theta1, theta2, angle = 0, center = None, lw = 5, color = (0,0,0), w = 1600, h = 1600, length = None):
-
-        self.width = w
-        self.height = h
-
-        self.a = a
-        self.b = b
-        self.theta1 = theta1
-        self.theta2 = theta2
-
-        self.angle = angle
-
-        self.centerOfMass = self.getCenterOfMass()
-        if center:
-            self.center = sympy.Point(center)
-        else:
-            self.center = sympy.Point(random.randint(int(0 - self.centerOfMass.x), int(self.width - self.centerOfMass.x)),random.randint(int(0 - self.centerOfMass.y), int(self.height - self.centerOfMass.y)))
-        self.lw = lw
-        self.color = color
-
-        if length:
-            self.length = length
-        else:
-            def integrand(theta,a,b):
-                return math.sqrt((a**2)*(math.sin(theta)**2) + (b**2)*(math.cos(theta)**2))
-
-            # Calculate arcLength
-            self.length = integrate.quad(integrand, theta1, theta2, args=(self.a, self.b))[0]
-
-        self.setEllipse()
-
-    def getCenterOfMass(self):
-        print("Center of mass is undefined.")
-        return self.center
+from collections import namedtuple
+
+
+# Plain float point used on the hot path, sympy points are only built for the exact methods
+Point = namedtuple("Point", ["x", "y"])
+
+
+def carlsonRF(x, y, z):
+    # Carlson's symmetric elliptic integral of the first kind, by duplication (Numerical Recipes rf)
+    while True:
+        sx, sy, sz = math.sqrt(x), math.sqrt(y), math.sqrt(z)
+        lam = sx*(sy + sz) + sy*sz
+        x, y, z = (x + lam)/4, (y + lam)/4, (z + lam)/4
+        mean = (x + y + z)/3
+        dx, dy, dz = (mean - x)/mean, (mean - y)/mean, (mean - z)/mean
+        if max(abs(dx), abs(dy), abs(dz)) <= 0.0025:
+            break
+
+    e2, e3 = dx*dy - dz*dz, dx*dy*dz
+    return (1 + (e2/24 - 0.1 - 3*e3/44)*e2 + e3/14) / math.sqrt(mean)
+
+
+def carlsonRD(x, y, z):
+    # Carlson's symmetric elliptic integral of the second kind, by duplication (Numerical Recipes rd)
+    total, factor = 0, 1
+    while True:
+        sx, sy, sz = math.sqrt(x), math.sqrt(y), math.sqrt(z)
+        lam = sx*(sy + sz) + sy*sz
+        total += factor / (sz*(z + lam))
+        factor /= 4
+        x, y, z = (x + lam)/4, (y + lam)/4, (z + lam)/4
+        mean = (x + y + 3*z)/5
+        dx, dy, dz = (mean - x)/mean, (mean - y)/mean, (mean - z)/mean
+        if max(abs(dx), abs(dy), abs(dz)) <= 0.0015:
+            break
+
+    ea, eb = dx*dy, dz*dz
+    ec, ed = ea - eb, ea - 6*eb
+    ee = ed + 2*ec
+    return 3*total + factor*(1 + ed*(-3/14 + 9/88*ed - 9/52*dz*ee) + dz*(ee/6 + dz*(-9/22*ec + dz*3/26*ea))) / (mean*math.sqrt(mean))
+
+
+def ellipticE(phi, m):
+    # Incomplete elliptic integral of the second kind E(phi | m), the same as scipy.special.ellipeinc for 0 <= m < 1
+    # Carlson's forms hold on [-pi/2, pi/2], every further half turn adds twice the complete integral
+    turns = round(phi / math.pi)
+    s, c = math.sin(phi - turns*math.pi), math.cos(phi - turns*math.pi)
+    if m == 1:
+        # E(phi | 1) = sin(phi) there and the complete integral is 1, the Carlson forms would divide by zero
+        return s + 2*turns
+    y = 1 - m*s*s
+    partial = s*carlsonRF(c*c, y, 1) - m/3 * s**3 * carlsonRD(c*c, y, 1)
+    if turns == 0:
+        return partial
+    return partial + 2*turns*(carlsonRF(0, 1 - m, 1) - m/3 * carlsonRD(0, 1 - m, 1))
+
+
+def ellipseArcLength(a, b, theta1, theta2):
+    # Closed form of the integral of sqrt(a^2 sin^2 + b^2 cos^2) from theta1 to theta2
+    # Written as an incomplete elliptic integral of the second kind around the longer axis
+    if a >= b:
+        m = 1 - (b / a)**2
+        return float(a * (ellipticE(theta2 - math.pi/2, m) - ellipticE(theta1 - math.pi/2, m)))
+    m = 1 - (a / b)**2
+    return float(b * (ellipticE(theta2, m) - ellipticE(theta1, m)))
+
+
+@functools.lru_cache(maxsize = 4096)
+def ellipseMaxSpeed(a, b):
+    # Largest sqrt(r^2 + r'^2) of the polar form r = ab / sqrt((b*cos)^2 + (a*sin)^2)
+    # Found on a fine grid over a quarter turn (the rest is symmetric) with a 5% margin,
+    # which is far tighter than the analytic bound for very eccentric ellipses
+    theta = np.linspace(0, math.pi/2, 4097)
+    c, s = np.cos(theta), np.sin(theta)
+    r = (a * b) / np.sqrt((b * c)**2 + (a * s)**2)
+    dr = (b**2 - a**2) * s * c * r**3 / (a**2 * b**2)
+    return float(np.max(np.hypot(r, dr))) * 1.05
+
+
+def segmentDistance(p1, p2, q1, q2):
+    # Shortest distance between the segments p1-p2 and q1-q2
+    def cross(o, a, b):
+        return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+    # Proper crossing
+    if cross(p1, p2, q1) * cross(p1, p2, q2) < 0 and cross(q1, q2, p1) * cross(q1, q2, p2) < 0:
+        return 0.0
+
+    def pointDistance(p, a, b):
+        dx, dy = b[0] - a[0], b[1] - a[1]
+        lengthSquared = dx*dx + dy*dy
+        t = 0 if lengthSquared == 0 else max(0, min(1, ((p[0] - a[0]) * dx + (p[1] - a[1]) * dy) / lengthSquared))
+        return math.hypot(p[0] - a[0] - t*dx, p[1] - a[1] - t*dy)
+
+    return min(pointDistance(p1, q1, q2), pointDistance(p2, q1, q2), pointDistance(q1, p1, p2), pointDistance(q2, p1, p2))
+
+
+class ArcGeometry():
+    # Methods shared by Arc and the views of an ArcSet, they only use the attributes both provide
+    __slots__ = ()
 
     def randomizePositioning(self):
+        centers, theta1s = self.getRandomPositions(1)
+        self.setPositioning(centers[0], theta1s[0])
+
+    def getRandomPositions(self, count):
+        # Draw several candidate centers and start angles at once
         # Approximate adjustments based on centerOfMass
-        self.center = sympy.Point(random.randint(int(0 - self.centerOfMass.x), int(self.width - self.centerOfMass.x)),random.randint(int(0 - self.centerOfMass.y), int(self.height - self.centerOfMass.y)))
+        xs = self.rng.integers(int(0 - self.centerOfMass.x), int(self.width - self.centerOfMass.x), size = count, endpoint = True)
+        ys = self.rng.integers(int(0 - self.centerOfMass.y), int(self.height - self.centerOfMass.y), size = count, endpoint = True)
+        theta1s = self.rng.random(count)*2*math.pi
 
+        return [(int(x), int(y)) for x, y in zip(xs, ys)], [float(theta1) for theta1 in theta1s]
+
+    def setPositioning(self, center, theta1):
+        # Move the arc, keeping its angular span
         totalAngle = self.theta2 - self.theta1
-        self.theta1 = random.random()*2*math.pi
+        self.center = Point(*center)
+        self.theta1 = theta1
         self.theta2 = self.theta1 + totalAngle
 
         self.setEllipse()
 
     def getLength(self):
-        # Integral formula for arc length
-        def integrand(theta,a,b):
-            return math.sqrt((a**2)*(math.sin(theta)**2) + (b**2)*(math.cos(theta)**2))
-
-        return integrate.quad(integrand, self.theta1, self.theta2, args=(self.a,self.b))
-
-    def setEllipse(self):
-        self.ellipse = sympy.Ellipse(self.center, self.a, self.b)
+        # Integral formula for arc length, returned with a zero error estimate like integrate.quad
+        return ellipseArcLength(self.a, self.b, self.theta1, self.theta2), 0.0
 
     def pointOnArc(self, pointX, pointY):
         # ASSUMES POINT IS ON THE ELLIPSE
@@ -79,27 +145,99 @@ class Arc():
 
         return False
 
+    def angleOnArc(self, angle):
+        # Angle is the direction from the center, so undo the rotation before comparing
+        offset = (angle - self.angle - self.theta1) % (2 * math.pi)
+        return offset <= self.theta2 - self.theta1
+
     def getPoint(self, angle):
-        angle = angle % (2 * math.pi)
-        # Derived formulas
-        if 0 <= angle <= math.pi/2 or 3*math.pi/2 <= angle <= 2*math.pi:
-            x = self.center.x + (self.a * self.b) / (math.sqrt(self.b**2 + self.a**2 * (math.tan(angle))**2))
-            y = self.center.y + (self.a * self.b * math.tan(angle)) / (math.sqrt(self.b**2 + self.a**2 * (math.tan(angle))**2))
-        else:
-            x = self.center.x - (self.a * self.b) / (math.sqrt(self.b**2 + self.a**2 * (math.tan(angle))**2))
-            y = self.center.y - (self.a * self.b * math.tan(angle)) / (math.sqrt(self.b**2 + self.a**2 * (math.tan(angle))**2))
-        
+        # Polar form of the ellipse, r = ab / sqrt((b*cos)^2 + (a*sin)^2), so no quadrant branches are needed
+        c, s = math.cos(angle), math.sin(angle)
+        r = (self.a * self.b) / math.sqrt((self.b * c)**2 + (self.a * s)**2)
+        x, y = r * c, r * s
+
         if self.angle != 0:
             # Rotate the point with respect to the center
             c, s = math.cos(self.angle), math.sin(self.angle)
-            nx = c * (x - self.center.x) - s * (y - self.center.y) + self.center.x
-            ny = s * (x - self.center.x) + c * (y - self.center.y) + self.center.y
-            x, y = nx, ny
-        return (x,y)
+            x, y = c * x - s * y, s * x + c * y
+        return (self.center.x + x, self.center.y + y)
+
+    def getPoints(self, angles):
+        # Same as getPoint but for a whole array of angles in one pass
+        angles = np.asarray(angles, dtype=np.float64)
+        c, s = np.cos(angles), np.sin(angles)
+        r = (self.a * self.b) / np.sqrt((self.b * c)**2 + (self.a * s)**2)
+
+        # Fold the rotation into the polar angle instead of rotating afterwards
+        xs = r * np.cos(angles + self.angle) + self.center.x
+        ys = r * np.sin(angles + self.angle) + self.center.y
+        return xs, ys
+
+    def getCandidatePoints(self, centers, theta1s, divisions):
+        # Sample the arc at many candidate positions at once, one row per candidate
+        centers = np.asarray(centers, dtype=np.float64)
+        angles = np.asarray(theta1s, dtype=np.float64)[:, None] + np.linspace(0, self.theta2 - self.theta1, int(divisions))
+        c, s = np.cos(angles), np.sin(angles)
+        r = (self.a * self.b) / np.sqrt((self.b * c)**2 + (self.a * s)**2)
+
+        xs = r * np.cos(angles + self.angle) + centers[:, 0:1]
+        ys = r * np.sin(angles + self.angle) + centers[:, 1:2]
+        return xs, ys
+
+    def samplePoints(self, divisions, startTheta, endTheta):
+        # Evenly spaced angles and the matching coordinates as contiguous float64 arrays
+        angles = np.linspace(startTheta, endTheta, int(divisions))
+        xs, ys = self.getPoints(angles)
+        return angles, xs, ys
+
+    def getExtremeAngles(self):
+        # Polar angles where the rotated ellipse reaches its leftmost, rightmost, lowest and highest points
+        # Found on the parametric angle u, where x = a*cos(u)*cos(angle) - b*sin(u)*sin(angle) and likewise for y
+        c, s = math.cos(self.angle), math.sin(self.angle)
+        angles = []
+        for u in [math.atan2(-self.b * s, self.a * c), math.atan2(self.b * c, self.a * s)]:
+            for u in [u, u + math.pi]:
+                angles.append(math.atan2(self.b * math.sin(u), self.a * math.cos(u)))
+        return angles
+
+    def getBoundingBox(self, margin = 0):
+        # Tight box of the arc, its ends plus whichever extremes of the ellipse fall between them
+        span = self.theta2 - self.theta1
+        angles = [self.theta1, self.theta2]
+        for angle in self.getExtremeAngles():
+            offset = (angle - self.theta1) % (2 * math.pi)
+            if offset <= span:
+                angles.append(self.theta1 + offset)
+
+        points = [self.getPoint(angle) for angle in angles]
+        xs, ys = [float(x) for x, _ in points], [float(y) for _, y in points]
+        return (min(xs) - margin, min(ys) - margin, max(xs) + margin, max(ys) + margin)
+
+    def getBoundingBoxes(self, centers, theta1s, margin = 0):
+        # Same as getBoundingBox for many candidate positions at once, as a (K, 4) array
+        theta1s = np.asarray(theta1s, dtype=np.float64)
+        span = self.theta2 - self.theta1
+
+        # Extremes outside the arc fall back to its start, which is already a candidate point
+        offsets = (np.array(self.getExtremeAngles())[None, :] - theta1s[:, None]) % (2 * math.pi)
+        offsets = np.where(offsets <= span, offsets, 0)
+        angles = theta1s[:, None] + np.concatenate((np.zeros((len(theta1s), 1)), np.full((len(theta1s), 1), span), offsets), axis=1)
+
+        c, s = np.cos(angles), np.sin(angles)
+        r = (self.a * self.b) / np.sqrt((self.b * c)**2 + (self.a * s)**2)
+        centers = np.asarray(centers, dtype=np.float64).reshape(-1, 2)
+        xs = r * np.cos(angles + self.angle) + centers[:, 0:1]
+        ys = r * np.sin(angles + self.angle) + centers[:, 1:2]
+        return np.column_stack((xs.min(axis=1) - margin, ys.min(axis=1) - margin, xs.max(axis=1) + margin, ys.max(axis=1) + margin))
+
+    def getStrokeMargin(self, dpi = 100):
+        # Half the line width in pixels, line widths are in points like matplotlib, 72 points per inch
+        return self.lw * dpi / 72 / 2
 
     def exactOutOfBounds(self):
         if self.angle != 0:
             raise Exception("Angle must be 0. Use fastOutOfBounds instead")
+        import sympy
         a = self.ellipse
 
         # Create rectangle representing boundary
@@ -139,88 +277,181 @@ class Arc():
         return False
 
     def subdivide(self, divisions, startTheta, endTheta): 
-        # Splits arc into even sections
-        points = []
-        angleChange = (endTheta - startTheta) / (divisions - 1)
+        # Splits arc into even sections, as (angle, (x, y)) pairs
+        angles, xs, ys = self.samplePoints(divisions, startTheta, endTheta)
+        points = [(angle, (x, y)) for angle, x, y in zip(angles, xs, ys)]
 
-        for i in range(divisions):
-            angle = startTheta + i*angleChange
-            x,y = self.getPoint(angle)
-            points.append((angle, (x, y)))
-        
         return np.array(points, dtype=object)
 
     def fastMinimumDistance(self, arc):
         start, end = self.theta1, self.theta2
         arcStart, arcEnd = arc.theta1, arc.theta2
         
-        subdivisions = self.length//7
-        minDist = ("NA", "NA", float("inf"))  
+        # With at least 4 samples the neighbours of the closest pair always leave out part of the range
+        subdivisions = max(int(self.length//7), 4)
 
         while (end - start) > 0.01 or (arcEnd - arcStart) > 0.01:
             if subdivisions > 5:
                 subdivisions = int(subdivisions / 1.5)
-            minDist = ("NA", "NA", float("inf"))  
 
-            points = self.subdivide(subdivisions, start, end)
-            arcPoints = arc.subdivide(subdivisions, arcStart, arcEnd)          
+            angles, xs, ys = self.samplePoints(subdivisions, start, end)
+            arcAngles, arcXs, arcYs = arc.samplePoints(subdivisions, arcStart, arcEnd)
 
+            distances = np.hypot(xs[:, None] - arcXs[None, :], ys[:, None] - arcYs[None, :])
+            i, j = np.unravel_index(np.argmin(distances), distances.shape)
 
-            distances = distance.cdist([x[1] for x in points], [x[1] for x in arcPoints], 'euclidean')
-            i, j = np.argwhere(distances == np.min(distances))[0]
+            # Narrow both ranges to the neighbours of the closest pair
+            start, end = angles[max(i - 1, 0)], angles[min(i + 1, subdivisions - 1)]
+            arcStart, arcEnd = arcAngles[max(j - 1, 0)], arcAngles[min(j + 1, subdivisions - 1)]
 
-            if i == 0:
-                start = points[i][0]
-                end = points[i+1][0]
-            elif i == subdivisions - 1: 
-                end = points[i][0]
-                start = points[i-1][0]
-            else:
-                start = points[i-1][0]
-                end = points[i+1][0]
-
-            if j == 0:
-                arcStart = arcPoints[j][0]
-                arcEnd = arcPoints[j+1][0]
-            elif j == subdivisions - 1: 
-                arcEnd = arcPoints[j][0]
-                arcStart = arcPoints[j-1][0]
+        return distances[i][j]
+
+    def getMaxSpeed(self):
+        # Bound on |dP/dtheta| of the polar form, so a sub-arc of angular width w
+        # stays within getMaxSpeed()*w/2 of the point at its middle angle
+        return ellipseMaxSpeed(self.a, self.b)
+
+    def getPieceBound(self, angleWidth):
+        # How far a sub-arc can stray from its chord, every point is within half its length of an endpoint
+        # Once the piece turns by at most 90 degrees the sagitta bound from the largest curvature is tighter
+        length = self.getMaxSpeed() * angleWidth
+        curvature = max(self.a, self.b) / min(self.a, self.b)**2
+        if curvature * length <= math.pi/2:
+            return min(length / 2, curvature * length**2 / 8)
+        return length / 2
+
+    def boundedMinimumDistance(self, arc, threshold = None, tolerance = 0.01):
+        # Branch and bound over pairs of sub-arcs
+        # Returns (distance, error) with the true minimum between distance - error and distance
+        # With a threshold it stops as soon as the distance is known to be below it, or known not to be,
+        # or once it is known to within the tolerance, so only distance - error is sure to be on the right side
+        speed, arcSpeed = self.getMaxSpeed(), arc.getMaxSpeed()
+
+        # Start with pieces of about 20 pixels, so each arc is split according to its own length
+        def getPieces(shape, shapeSpeed):
+            count = min(max(math.ceil((shape.theta2 - shape.theta1) * shapeSpeed / 20), 1), 64)
+            edges = np.linspace(shape.theta1, shape.theta2, count + 1)
+            xs, ys = shape.getPoints(np.concatenate((edges, (edges[:-1] + edges[1:]) / 2)))
+            points = list(zip(xs.tolist(), ys.tolist()))
+            return edges.tolist(), points[:count + 1], np.column_stack((xs[count + 1:], ys[count + 1:])), shapeSpeed * (edges[1] - edges[0]) / 2
+
+        edges, edgePoints, middles, radius = getPieces(self, speed)
+        arcEdges, arcEdgePoints, arcMiddles, arcRadius = getPieces(arc, arcSpeed)
+
+        # Cheap first bound for every starting pair, each piece lies in a disk around its middle point
+        distances = np.hypot(middles[:, None, 0] - arcMiddles[None, :, 0], middles[:, None, 1] - arcMiddles[None, :, 1])
+        lowerBounds = distances - radius - arcRadius
+        best = min(float(distances.min()), min(math.dist(p, q) for p in [edgePoints[0], edgePoints[-1]] for q in [arcEdgePoints[0], arcEdgePoints[-1]]))
+
+        # Lowest bound of any pair that was dropped without being refined
+        dropped = float("inf")
+        heap = []
+        for i, j in zip(*np.nonzero(lowerBounds < best)):
+            heap.append((float(lowerBounds[i, j]), edges[i], edges[i + 1], edgePoints[i], edgePoints[i + 1], arcEdges[j], arcEdges[j + 1], arcEdgePoints[j], arcEdgePoints[j + 1]))
+        heapq.heapify(heap)
+        if not heap:
+            dropped = float(lowerBounds.min())
+
+        while heap:
+            if threshold is not None and best < threshold:
+                break
+
+            lowerBound, start, end, startPoint, endPoint, arcStart, arcEnd, arcStartPoint, arcEndPoint = heapq.heappop(heap)
+            if lowerBound >= best - tolerance or (threshold is not None and lowerBound >= threshold):
+                # Every remaining pair is at least this far apart
+                dropped = min(dropped, lowerBound)
+                break
+
+            # Split whichever piece is longer
+            if speed * (end - start) >= arcSpeed * (arcEnd - arcStart):
+                middle = (start + end) / 2
+                middlePoint = self.getPoint(middle)
+                children = [(start, middle, startPoint, middlePoint, arcStart, arcEnd, arcStartPoint, arcEndPoint), (middle, end, middlePoint, endPoint, arcStart, arcEnd, arcStartPoint, arcEndPoint)]
+                best = min(best, math.dist(middlePoint, arcStartPoint), math.dist(middlePoint, arcEndPoint))
             else:
-                arcStart = arcPoints[j-1][0]
-                arcEnd = arcPoints[j+1][0]
+                middle = (arcStart + arcEnd) / 2
+                middlePoint = arc.getPoint(middle)
+                children = [(start, end, startPoint, endPoint, arcStart, middle, arcStartPoint, middlePoint), (start, end, startPoint, endPoint, middle, arcEnd, middlePoint, arcEndPoint)]
+                best = min(best, math.dist(startPoint, middlePoint), math.dist(endPoint, middlePoint))
 
-        #return math.sqrt(minDist[2])
-        return distances[i][j]
+            for child in children:
+                childStart, childEnd, childStartPoint, childEndPoint, childArcStart, childArcEnd, childArcStartPoint, childArcEndPoint = child
 
-    def fastOutOfBounds(self):
-        points = self.subdivide(int(self.length), self.theta1, self.theta2)
-        # If any point is out of bounds, arc is out of bounds
-        for _, point in points:
-            x, y = point
-            if x > self.width or x < 0 or y > self.height or y < 0: 
-                return True
-        return False
+                # Chord to chord distance, less how far each piece can bulge away from its chord
+                bulge = self.getPieceBound(childEnd - childStart) + arc.getPieceBound(childArcEnd - childArcStart)
+                childBound = max(lowerBound, segmentDistance(childStartPoint, childEndPoint, childArcStartPoint, childArcEndPoint) - bulge)
+
+                if childBound < best - tolerance and (threshold is None or childBound < threshold):
+                    heapq.heappush(heap, (childBound,) + child)
+                else:
+                    dropped = min(dropped, childBound)
+
+        lowest = min(dropped, heap[0][0] if heap else float("inf"), best)
+        return best, best - lowest
+
+    def fastOutOfBounds(self, dpi = 100):
+        # Constant time, the whole stroke must fit on the canvas
+        xmin, ymin, xmax, ymax = self.getBoundingBox(self.getStrokeMargin(dpi))
+        return xmin < 0 or ymin < 0 or xmax > self.width or ymax > self.height
 
     def fastCollision(self, arc):
         if self.fastMinimumDistance(arc) < 1:
             return True
         return False
 
-class EllipticalArc(Arc):
-    def __init__(self, a, b, theta1, theta2, angle = 0, center = None, lw = 5, color = (0,0,0), width = 1600, height = 1600, length = None):
-        self.type = "Elliptical Arc"
-        super().__init__(a, b, theta1, theta2, angle, center, lw, color, width, height, length)
+class Arc(ArcGeometry):
+    def __init__(self, a, b, theta1, theta2, angle = 0, center = None, lw = 5, color = (0,0,0), w = 1600, h = 1600, length = None, rng = None):
+
+        self.width = w
+        self.height = h
+
+        # numpy Generator used for every random placement of this arc
+        self.rng = np.random.default_rng(rng)
+
+        self.a = a
+        self.b = b
+        self.theta1 = theta1
+        self.theta2 = theta2
+
+        self.angle = angle
+
+        self.centerOfMass = self.getCenterOfMass()
+        if center:
+            self.center = Point(*center)
+        else:
+            self.center = Point(*self.getRandomPositions(1)[0][0])
+        self.lw = lw
+        self.color = color
+
+        if length:
+            self.length = length
+        else:
+            # Calculate arcLength
+            self.length = ellipseArcLength(self.a, self.b, theta1, theta2)
+
+        self.setEllipse()
 
     def getCenterOfMass(self):
-        # Very approximate
-        # Average of circles created from each axis
-        x = (self.a+self.b)/2 * (math.sin(self.theta2+self.angle) - math.sin(self.theta1+self.angle))/(self.theta1+self.angle + self.theta2+self.angle)
-        y = (self.a+self.b)/2 * (-math.cos(self.theta2+self.angle) + math.cos(self.theta1+self.angle))/(self.theta1+self.angle + self.theta2+self.angle)
+        print("Center of mass is undefined.")
+        return self.center
+
+    def setEllipse(self):
+        # The sympy ellipse is only needed by the exact methods, so it is built on first use
+        self._ellipse = None
 
-        return sympy.Point(x,y)
+    @property
+    def ellipse(self):
+        if self._ellipse is None:
+            import sympy
+            self._ellipse = sympy.Ellipse(sympy.Point(self.center), self.a, self.b)
+        return self._ellipse
+
+class EllipticalArcGeometry(ArcGeometry):
+    __slots__ = ()
 
     def getDrawing(self):
-        return matplotlib.patches.Arc(self.center, self.a*2, self.b*2, angle = self.angle*57.2957, theta1=self.theta1*57.2957, theta2=self.theta2*57.2957, color=self.color, lw = self.lw)
+        from matplotlib import patches
+        return patches.Arc(self.center, self.a*2, self.b*2, angle = self.angle*57.2957, theta1=self.theta1*57.2957, theta2=self.theta2*57.2957, color=self.color, lw = self.lw)
 
     def getTitles(self):
         return ["Type", "a", "b", "Start Angle", "End Angle", "Rotation", "Center"]
@@ -228,81 +459,108 @@ class EllipticalArc(Arc):
     def printShape(self):
         return self.type, self.a, self.b, self.theta1, self.theta2, self.angle, (self.center.x, self.center.y)
 
-class CircularArc(Arc):
-    def __init__(self, radius, theta1, theta2, center = None, angle = 0, lw = 5, color = (0,0,0), width = 1600, height = 1600, length = None):
-        self.radius = radius # redundant for readability later
-        self.type = "Circular Arc"
-        super().__init__(radius, radius, theta1, theta2, angle, center, lw, color, width, height, length)
+class EllipticalArc(EllipticalArcGeometry, Arc):
+    def __init__(self, a, b, theta1, theta2, angle = 0, center = None, lw = 5, color = (0,0,0), width = 1600, height = 1600, length = None, rng = None):
+        self.type = "Elliptical Arc"
+        super().__init__(a, b, theta1, theta2, angle, center, lw, color, width, height, length, rng)
 
     def getCenterOfMass(self):
-        # Derived formulas
-        x = self.radius * (math.sin(self.theta2) - math.sin(self.theta1))/(self.theta1 + self.theta2)
-        y = self.radius * (-math.cos(self.theta2) + math.cos(self.theta1))/(self.theta1 + self.theta2)
-        return sympy.Point(x,y)
+        # Very approximate
+        # Average of circles created from each axis
+        x = (self.a+self.b)/2 * (math.sin(self.theta2+self.angle) - math.sin(self.theta1+self.angle))/(self.theta1+self.angle + self.theta2+self.angle)
+        y = (self.a+self.b)/2 * (-math.cos(self.theta2+self.angle) + math.cos(self.theta1+self.angle))/(self.theta1+self.angle + self.theta2+self.angle)
+
+        return Point(x,y)
+
+class CircularArcGeometry(ArcGeometry):
+    __slots__ = ()
+
+    def getIntersections(self, arc):
+        # Closed form circle-circle intersection, keeping only points that lie on both arcs
+        (x1, y1), (x2, y2) = self.center, arc.center
+        dx, dy = x2 - x1, y2 - y1
+        d = math.hypot(dx, dy)
+
+        if d == 0 or d > self.radius + arc.radius or d < abs(self.radius - arc.radius):
+            return []
+
+        # Distance from self.center to the chord, and half the chord length
+        along = (d**2 + self.radius**2 - arc.radius**2) / (2 * d)
+        half = math.sqrt(max(self.radius**2 - along**2, 0))
+        mx, my = x1 + along * dx / d, y1 + along * dy / d
+
+        points = [(mx - half * dy / d, my + half * dx / d), (mx + half * dy / d, my - half * dx / d)]
+        return [point for point in points if self.containsPoint(point) and arc.containsPoint(point)]
+
+    def containsPoint(self, point):
+        # Assumes the point is on the circle
+        return self.angleOnArc(math.atan2(point[1] - self.center.y, point[0] - self.center.x))
+
+    def anglesOverlap(self, arc):
+        # True if the arcs share any direction from their centers
+        return any(self.angleOnArc(angle + arc.angle) for angle in [arc.theta1, arc.theta2]) or any(arc.angleOnArc(angle + self.angle) for angle in [self.theta1, self.theta2])
+
+    def exactCollision(self, arc):
+        if self == arc:
+            return False
+
+        if self.center == arc.center and self.radius == arc.radius:
+            # Same circle, so they collide if the angle ranges overlap at all
+            return self.anglesOverlap(arc)
+
+        return len(self.getIntersections(arc)) > 0
 
     def exactMinimumDistance(self, arc):
-        # Four cases
+        # Minimum is either a collision or one of these critical cases
         # 1. Endpoints on each arc (4 options)
-        # 2. Endpoint of one arc and intersection of line from center of the other to endpoint (4 options)
-        # 3. Points along line between centers of intersection of both arcs (1 option)
+        # 2. Endpoint of one arc and the nearest point of the other circle, on the line through its center (4 options)
+        # 3. Points on the line between centers on both arcs (4 options)
         # 4. Collision points - Assumed to be distance -1 
-        
-        # Case 1
-        collisions = self.checkCollision(arc)
-        if collisions:
-            return -1
-    
-        minDist = float("inf")
 
-        # Case 2
-        for angle in [self.theta1, self.theta2]:
-            point = sympy.Point(self.getPoint(angle))
-            line = sympy.Line(arc.center, point)
-
-            possiblePoints = line.intersection(arc.ellipse)
+        # Case 4
+        if self.exactCollision(arc):
+            return -1
 
-            for possiblePoint in possiblePoints:
-                if self.pointOnArc(possiblePoint.x, possiblePoint.y):
-                    dist = point.distance(possiblePoint)
-                    minDist = min(dist, minDist)
+        minDist = float("inf")
+        ends = [self.getPoint(angle) for angle in [self.theta1, self.theta2]]
+        arcEnds = [arc.getPoint(angle) for angle in [arc.theta1, arc.theta2]]
 
-        # Arc endpoints
-        for angle in [arc.theta1, arc.theta2]:
-            point = sympy.Point(arc.getPoint(angle))
-            line = sympy.Line(self.center, point)
+        # Case 1
+        for point in ends:
+            for arcPoint in arcEnds:
+                minDist = min(minDist, math.dist(point, arcPoint))
 
-            possiblePoints = line.intersection(self.ellipse)
+        # Case 2
+        for point, other in [(point, arc) for point in ends] + [(point, self) for point in arcEnds]:
+            centerDist = math.dist(point, other.center)
+            angle = math.atan2(point[1] - other.center.y, point[0] - other.center.x)
 
-            for possiblePoint in possiblePoints:
-                if arc.pointOnArc(possiblePoint.x, possiblePoint.y):
-                    dist = point.distance(possiblePoint)
-                    minDist = min(dist, minDist)
+            if other.angleOnArc(angle):
+                minDist = min(minDist, abs(centerDist - other.radius))
 
         # Case 3
-        for angle1 in [self.theta1, self.theta2]:
-            point1 = sympy.Point(self.getPoint(angle1))
-            for angle2 in [arc.theta1, arc.theta2]:
-                point2 = sympy.Point(arc.getPoint(angle2))
-                dist = point1.distance(point2)
-                minDist = min(dist, minDist)
-
-        # Case 4
-        line = sympy.Line(self.center, arc.center)
-        
-        arc1Points = line.intersection(self.ellipse)
-        arc1Points = [point for point in arc1Points if self.pointOnArc(point.x, point.y)]
-        arc2Points = line.intersection(arc.ellipse)
-        arc2Points = [point for point in arc2Points if arc.pointOnArc(point.x, point.y)]
+        (x1, y1), (x2, y2) = self.center, arc.center
+        if (x1, y1) == (x2, y2):
+            # Concentric, every shared direction is on the line between centers
+            if self.anglesOverlap(arc):
+                minDist = min(minDist, abs(self.radius - arc.radius))
+        else:
+            toArc = math.atan2(y2 - y1, x2 - x1)
+            for angle1 in [toArc, toArc + math.pi]:
+                if not self.angleOnArc(angle1):
+                    continue
+                point1 = (x1 + self.radius * math.cos(angle1), y1 + self.radius * math.sin(angle1))
 
-        for point1 in arc1Points:
-            for point2 in arc2Points:
-                dist = point1.distance(point2)
-                minDist = min(dist, minDist)
+                for angle2 in [toArc, toArc + math.pi]:
+                    if arc.angleOnArc(angle2):
+                        point2 = (x2 + arc.radius * math.cos(angle2), y2 + arc.radius * math.sin(angle2))
+                        minDist = min(minDist, math.dist(point1, point2))
 
         return minDist
 
     def getDrawing(self):
-        return matplotlib.patches.Arc(self.center, self.a*2, self.b*2, theta1=self.theta1*57.2957, theta2=self.theta2*57.2957, color=self.color, lw = self.lw)
+        from matplotlib import patches
+        return patches.Arc(self.center, self.a*2, self.b*2, theta1=self.theta1*57.2957, theta2=self.theta2*57.2957, color=self.color, lw = self.lw)
 
     def getTitles(self):
         return ["Type", "Radius", "Start Angle", "End Angle", "Center"]
@@ -310,6 +568,18 @@ class CircularArc(Arc):
     def printShape(self):
         return self.type, self.radius, self.theta1, self.theta2, (self.center.x, self.center.y)
 
+class CircularArc(CircularArcGeometry, Arc):
+    def __init__(self, radius, theta1, theta2, center = None, angle = 0, lw = 5, color = (0,0,0), width = 1600, height = 1600, length = None, rng = None):
+        self.radius = radius # redundant for readability later
+        self.type = "Circular Arc"
+        super().__init__(radius, radius, theta1, theta2, angle, center, lw, color, width, height, length, rng)
+
+    def getCenterOfMass(self):
+        # Derived formulas
+        x = self.radius * (math.sin(self.theta2) - math.sin(self.theta1))/(self.theta1 + self.theta2)
+        y = self.radius * (-math.cos(self.theta2) + math.cos(self.theta1))/(self.theta1 + self.theta2)
+        return Point(x,y)
+
 
 
 
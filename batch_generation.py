@@ -0,0 +1,139 @@
+import argparse
+import os
+import numpy as np
+from multiprocessing import Barrier, Pool
+from hair_images import HairImage
+from image_stream import createGenerator, createPlacementPool
+from image_writer import ImageWriter
+from main import saveShapeData
+from random_streams import RandomStreams
+from shape_store import ShapeStore
+
+
+# No windows are opened, and setting the backend this way doesn't import matplotlib before it is used
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+def createTasks(spec, images, seed = None, prefix = "image"):
+    # One independent seed per image, so any image can be regenerated on its own
+    seeds = np.random.SeedSequence(seed).spawn(images)
+    return [dict(spec, index = i, seed = int(s.generate_state(1)[0]), fileName = f"{prefix}-{i:06d}") for i, s in enumerate(seeds)]
+
+# Background writer of this process, only set up when writing asynchronously
+writer = None
+flushBarrier = None
+
+# Placement workers shared by every image, only when images are made one at a time
+placementPool = None
+
+def startWriter(spec, barrier = None):
+    # Also the Pool initializer, each worker process gets its own writer that flushWriter closes at the end
+    global writer, flushBarrier
+    writer = ImageWriter(spec["output"], spec["queueSize"], compression = spec["compression"], shardSize = spec["shardSize"])
+    flushBarrier = barrier
+
+def flushWriter(task):
+    # The barrier holds each worker until all have taken one of these tasks, so every worker's writer gets closed
+    # and errors from its last writes come back to the parent like any other task's
+    global writer
+    flushBarrier.wait()
+    closing, writer = writer, None
+    closing.close()
+
+def generateImage(task):
+    streams = RandomStreams(task["seed"])
+
+    generator = createGenerator(task, streams.geometry, placementPool)
+    generator.generateArcs(task["amount"])
+
+    if writer is not None:
+        # Encoding and writing happen on the writer's thread, no figure is needed
+        img = HairImage(task["width"], task["height"], task["dpi"], seed = streams.noise, figure = False)
+        img.draw(generator.arcSet)
+        writer.write(img.process(), None if task["store"] else generator.arcSet, task["fileName"], generator.metrics.merge(img.metrics), task["index"])
+    else:
+        img = HairImage(task["width"], task["height"], task["dpi"], seed = streams.noise)
+        img.draw(generator.arcSet)
+        img.realify()
+        saveShapeData(generator.arcSet, img.fig, task["fileName"], task["output"], writeCsv = not task["store"], metrics = generator.metrics.merge(img.metrics))
+
+        # Workers make many images, so the figure goes back to be reused by the next one
+        img.close()
+
+    # Shape columns go back to the parent, which is the only process writing the store
+    columns = ShapeStore.getColumns(generator.arcSet, task["index"]) if task["store"] else None
+    return task["fileName"], task["seed"], len(generator.arcs), generator.placementReport["dropped"], columns
+
+def collectResults(results, store, firstId = 0):
+    # Image ids in the store continue from firstId, tasks only know their place in this batch
+    for fileName, imageSeed, arcCount, dropped, columns in results:
+        if store is not None:
+            store.append(dict(columns, imageId = columns["imageId"] + firstId))
+        yield fileName, imageSeed, arcCount, dropped
+
+def generateBatch(spec, images, workers = 1, seed = None, prefix = "image"):
+    # Yields (fileName, seed, arc count, arcs dropped) as each image finishes
+    # With asyncWrite an image may still be on its way to disk when it is yielded, all are written once this returns
+    tasks = createTasks(spec, images, seed, prefix)
+    store = ShapeStore(spec["store"]) if spec.get("store") else None
+    firstId = store.getNextId() if store is not None else 0
+    asyncWrite = spec.get("asyncWrite")
+
+    if workers <= 1:
+        global writer, placementPool
+        if asyncWrite:
+            startWriter(spec)
+        placementPool = createPlacementPool(spec)
+        try:
+            yield from collectResults(map(generateImage, tasks), store, firstId)
+        finally:
+            if placementPool is not None:
+                placementPool.close()
+                placementPool.join()
+                placementPool = None
+            if writer is not None:
+                writer.close()
+                writer = None
+        return
+
+    with Pool(workers, initializer = startWriter if asyncWrite else None, initargs = (spec, Barrier(workers))) as pool:
+        yield from collectResults(pool.imap_unordered(generateImage, tasks, chunksize = max(len(tasks) // (workers * 4), 1)), store, firstId)
+
+        # Leaving the with block kills the workers, so their writers are flushed first
+        if asyncWrite:
+            pool.map(flushWriter, range(workers), chunksize = 1)
+
+def parseArgs(args = None):
+    parser = argparse.ArgumentParser(description = "Generate a batch of hair images and their shape data without prompts.")
+    parser.add_argument("type", choices = ["circular", "elliptical"], help = "arc type")
+    parser.add_argument("--curvature", default = "0.005-0.02", help = "curvature of circular arcs, a float or a range like a-b")
+    parser.add_argument("--eccentricity", default = "0-0.9", help = "eccentricity of elliptical arcs, a float or a range like a-b")
+    parser.add_argument("--angle", default = "0-3.14", help = "rotation of elliptical arcs in radians, a float or a range like a-b")
+    parser.add_argument("--length", default = "100-300", help = "arc length in pixels, a float or a range like a-b")
+    parser.add_argument("--min-dist", dest = "minDist", type = int, default = 10, help = "minimum separation between arcs")
+    parser.add_argument("--amount", type = int, default = 10, help = "number of arcs per image")
+    parser.add_argument("--width", type = int, default = 800)
+    parser.add_argument("--height", type = int, default = 800)
+    parser.add_argument("--dpi", type = int, default = 100)
+    parser.add_argument("--batch-size", dest = "batchSize", type = int, default = 1, help = "random positions tested together when placing an arc, 1 is fastest for dense layouts")
+    parser.add_argument("--placement", choices = ["pairwise", "field", "parallel"], default = "pairwise", help = "check new arcs against nearby arcs, against a distance field of everything placed, or nearby arcs in regions placed side by side")
+    parser.add_argument("--field-resolution", dest = "fieldResolution", type = float, default = 1, help = "cell size in pixels of the placement distance field")
+    parser.add_argument("--placement-workers", dest = "placementWorkers", type = int, default = 1, help = "processes for parallel placement, only used when images are not generated in parallel")
+    parser.add_argument("--images", type = int, default = 1, help = "number of images to generate")
+    parser.add_argument("--workers", type = int, default = 1, help = "number of worker processes")
+    parser.add_argument("--seed", type = int, default = None, help = "base seed, images get independent seeds derived from it")
+    parser.add_argument("--output", default = "hairTests", help = "folder for the images and csv files")
+    parser.add_argument("--prefix", default = "image", help = "file name prefix, followed by the image number")
+    parser.add_argument("--store", default = None, help = "folder of a ShapeStore to append shape data to instead of writing one csv per image")
+    parser.add_argument("--async-write", dest = "asyncWrite", action = "store_true", help = "encode and write files on a background thread instead of through matplotlib")
+    parser.add_argument("--queue-size", dest = "queueSize", type = int, default = 8, help = "images waiting to be written before generation pauses, with --async-write")
+    parser.add_argument("--compression", choices = list(ImageWriter.compressions), default = "none", help = "tiff compression, with --async-write")
+    parser.add_argument("--shard-size", dest = "shardSize", type = int, default = 0, help = "images per numbered subfolder of the output, 0 for one folder, with --async-write")
+    return parser.parse_args(args)
+
+if __name__ == "__main__":
+    args = parseArgs()
+    spec = {key: value for key, value in vars(args).items() if key not in ["images", "workers", "seed", "prefix"]}
+
+    # The per image seed is enough to regenerate that image alone with generateImage
+    for fileName, imageSeed, arcCount, dropped in generateBatch(spec, args.images, args.workers, args.seed, args.prefix):
+        print(fileName, imageSeed, arcCount, dropped)
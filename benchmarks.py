@@ -0,0 +1,144 @@
+import argparse
+import json
+import math
+import time
+import tracemalloc
+import matplotlib
+matplotlib.use("Agg")
+import numpy as np
+from arcs import CircularArc, EllipticalArc
+from arc_generation import CircularArcGenerator, EllipticalArcGenerator
+from hair_images import HairImage
+
+
+def getArcPairs(count, seed):
+    # Fixed random pairs of nearby arcs, so distance checks have real work to do
+    rng = np.random.default_rng(seed)
+    pairs = []
+    for i in range(count):
+        a = rng.uniform(40, 150)
+        b = a * rng.uniform(0.3, 1)
+        theta1 = rng.uniform(0, 2*math.pi)
+        first = EllipticalArc(a, b, theta1, theta1 + rng.uniform(1, 5), rng.uniform(0, math.pi), (800, 800), rng = rng)
+        second = EllipticalArc(b, a, theta1, theta1 + rng.uniform(1, 5), rng.uniform(0, math.pi), (800 + rng.uniform(-150, 150), 800 + rng.uniform(-150, 150)), rng = rng)
+        pairs.append((first, second))
+    return pairs
+
+def getCirclePairs(count, seed):
+    rng = np.random.default_rng(seed)
+    pairs = []
+    for i in range(count):
+        theta1, otherTheta1 = rng.uniform(0, 2*math.pi, 2)
+        first = CircularArc(rng.uniform(40, 150), theta1, theta1 + rng.uniform(1, 5), (800, 800), rng = rng)
+        second = CircularArc(rng.uniform(40, 150), otherTheta1, otherTheta1 + rng.uniform(1, 5), (800 + rng.uniform(-150, 150), 800 + rng.uniform(-150, 150)), rng = rng)
+        pairs.append((first, second))
+    return pairs
+
+def getBenchmarks(seed = 0, quick = False):
+    # Each entry makes a fresh callable and says how many items one call handles, for throughput
+    pairs = getArcPairs(50, seed)
+    circles = getCirclePairs(200, seed)
+    benchmarks = {}
+
+    benchmarks["getPoint"] = (lambda: lambda: [arc.getPoint(angle) for arc, _ in pairs for angle in np.linspace(arc.theta1, arc.theta2, 100).tolist()], len(pairs) * 100)
+    benchmarks["subdivide"] = (lambda: lambda: [arc.subdivide(200, arc.theta1, arc.theta2) for arc, _ in pairs], len(pairs))
+    benchmarks["fastMinimumDistance"] = (lambda: lambda: [first.fastMinimumDistance(second) for first, second in pairs], len(pairs))
+    benchmarks["boundedMinimumDistance"] = (lambda: lambda: [first.boundedMinimumDistance(second, threshold = 10) for first, second in pairs], len(pairs))
+    benchmarks["fastOutOfBounds"] = (lambda: lambda: [arc.fastOutOfBounds() for pair in pairs for arc in pair], len(pairs) * 2)
+    benchmarks["exactMinimumDistance"] = (lambda: lambda: [first.exactMinimumDistance(second) for first, second in circles], len(circles))
+
+    # Placement at increasing density and separation, generators are rebuilt so every run starts from the same seed
+    for amount in [50, 100] if quick else [50, 100, 200, 400]:
+        for minDist in [5, 20]:
+            def circular(amount = amount, minDist = minDist):
+                generator = CircularArcGenerator("0.005-0.02", "100-300", minDist, 1600, 1600, seed = seed)
+                return lambda: generator.generateArcs(amount)
+            def elliptical(amount = amount, minDist = minDist):
+                generator = EllipticalArcGenerator("0-0.9", "100-300", "0-3.14", minDist, 1600, 1600, seed = seed)
+                return lambda: generator.generateArcs(amount)
+            benchmarks[f"placeArcs circular {amount} minDist {minDist}"] = (circular, amount)
+            benchmarks[f"placeArcs elliptical {amount} minDist {minDist}"] = (elliptical, amount)
+
+    for size in [800, 1600] if quick else [800, 1600, 3200]:
+        def realify(size = size):
+            generator = CircularArcGenerator("0.005-0.02", "100-300", 10, size, size, seed = seed)
+            generator.generateArcs(size // 16)
+            img = HairImage(size, size, seed = seed)
+            img.draw(generator.arcs)
+            def run():
+                img.realify()
+                img.close()
+            return run
+        benchmarks[f"realify {size}px"] = (realify, 1)
+
+    return benchmarks
+
+def measure(setup, items, repeat):
+    # Best of several timed runs, then one more under tracemalloc for the peak of Python allocations
+    times = []
+    for i in range(repeat):
+        run = setup()
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    run = setup()
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {"seconds": min(times), "mean": sum(times) / len(times), "throughput": items / min(times), "peakMemory": peak}
+
+def compare(results, baseline, tolerance = 0.1):
+    # Slowdowns beyond the tolerance are regressions, speedups beyond it are improvements
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"{name:45s} {result['seconds']*1000:10.2f} ms   (no baseline)")
+            continue
+
+        ratio = result["seconds"] / baseline[name]["seconds"]
+        memoryRatio = result["peakMemory"] / max(baseline[name]["peakMemory"], 1)
+        if ratio > 1 + tolerance:
+            status = "REGRESSION"
+            regressions.append(name)
+        elif ratio < 1 - tolerance:
+            status = "faster"
+        else:
+            status = ""
+        print(f"{name:45s} {result['seconds']*1000:10.2f} ms {ratio:6.2f}x time {memoryRatio:6.2f}x memory {status}")
+
+    return regressions
+
+def parseArgs(args = None):
+    parser = argparse.ArgumentParser(description = "Time the geometry, placement and rendering hot paths.")
+    parser.add_argument("--filter", default = "", help = "only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type = int, default = 3, help = "timed runs per benchmark, the best is kept")
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--quick", action = "store_true", help = "skip the largest placement and image sizes")
+    parser.add_argument("--save", default = None, help = "json file to write the results to, for use as a baseline")
+    parser.add_argument("--baseline", default = None, help = "json file of an earlier run to compare against")
+    parser.add_argument("--tolerance", type = float, default = 0.1, help = "relative change in time that counts as a regression")
+    return parser.parse_args(args)
+
+if __name__ == "__main__":
+    args = parseArgs()
+    results = {}
+
+    for name, (setup, items) in getBenchmarks(args.seed, args.quick).items():
+        if args.filter not in name:
+            continue
+        results[name] = measure(setup, items, args.repeat)
+        if not args.baseline:
+            print(f"{name:45s} {results[name]['seconds']*1000:10.2f} ms {results[name]['throughput']:12.1f} /s {results[name]['peakMemory']/2**20:8.1f} MiB")
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(results, file, indent = 2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        if regressions:
+            raise SystemExit(1)
@@ -0,0 +1,80 @@
+import math
+import numpy as np
+
+
+class DistanceField():
+    def __init__(self, width, height, resolution = 1):
+        # Distance from each cell center to the nearest accepted sample, inf where nothing is close
+        # Cells are resolution pixels wide, row 0 is y = 0 like the rasterizer canvas
+        self.width = width
+        self.height = height
+        self.resolution = float(resolution)
+        self.field = np.full((math.ceil(height / self.resolution), math.ceil(width / self.resolution)), np.inf, dtype=np.float32)
+
+        # Flat indices of cells that were at least freeMinimum from everything, only built once the canvas fills up
+        self.freeCells = None
+        self.freeMinimum = None
+
+    def getCells(self, xs, ys):
+        # Cell of every point, points off the canvas are clamped to its edge
+        rows, cols = self.field.shape
+        i = np.clip(np.floor(np.asarray(ys) / self.resolution).astype(np.int64), 0, rows - 1)
+        j = np.clip(np.floor(np.asarray(xs) / self.resolution).astype(np.int64), 0, cols - 1)
+        return i, j
+
+    def insert(self, xs, ys, reach):
+        # Lower the field around the samples, only cells within reach of a sample are touched
+        # so the cost depends on the size of the arc and not on how much is already placed
+        xs, ys = np.asarray(xs, dtype=np.float64).ravel(), np.asarray(ys, dtype=np.float64).ravel()
+        rows, cols = self.field.shape
+        offsets = np.arange(-math.ceil(reach / self.resolution), math.ceil(reach / self.resolution) + 1)
+
+        i, j = self.getCells(xs, ys)
+        i = i[:, None, None] + offsets[None, :, None]
+        j = j[:, None, None] + offsets[None, None, :]
+        dist = np.hypot((j + 0.5) * self.resolution - xs[:, None, None], (i + 0.5) * self.resolution - ys[:, None, None])
+
+        inside = (i >= 0) & (i < rows) & (j >= 0) & (j < cols) & (dist <= reach)
+        i, j = np.broadcast_to(i, dist.shape)[inside], np.broadcast_to(j, dist.shape)[inside]
+        np.minimum.at(self.field, (i, j), dist[inside].astype(np.float32))
+
+    def query(self, xs, ys):
+        # Smallest field value under the points, along the last axis so a (K, N) array of candidates gives K values
+        i, j = self.getCells(xs, ys)
+        return self.field[i, j].min(axis=-1)
+
+    def sampleFree(self, rng, count, minimum):
+        # Random points in cells whose distance is at least minimum, as a (count, 2) array
+        flat = self.field.ravel()
+
+        # While most of the canvas is free, random cells of the whole field are enough
+        if self.freeCells is None or self.freeMinimum != minimum:
+            cells = rng.integers(flat.size, size = 2 * count)
+            cells = cells[flat[cells] >= minimum]
+            if len(cells) >= count:
+                return self.getPoints(cells[:count], rng)
+            self.freeCells = np.flatnonzero(flat >= minimum)
+            self.freeMinimum = minimum
+
+        # Fields only ever shrink, so the cached cells are a superset of the free ones
+        # Drawing from it and skipping filled cells is valid, it is only pruned once too many are filled
+        if len(self.freeCells) > 0:
+            cells = self.freeCells[rng.integers(len(self.freeCells), size = 2 * count)]
+            cells = cells[flat[cells] >= minimum]
+            if len(cells) < count:
+                self.freeCells = self.freeCells[flat[self.freeCells] >= minimum]
+                if len(self.freeCells) == 0:
+                    return np.empty((0, 2))
+                cells = self.freeCells[rng.integers(len(self.freeCells), size = count)]
+            return self.getPoints(cells[:count], rng)
+
+        return np.empty((0, 2))
+
+    def getPoints(self, cells, rng):
+        # A random point inside each of the cells
+        i, j = np.divmod(cells, self.field.shape[1])
+        return np.column_stack(((j + rng.random(len(cells))) * self.resolution, (i + rng.random(len(cells))) * self.resolution))
+
+    def getError(self):
+        # How much further a point can be from the samples than the center of its cell
+        return self.resolution * math.sqrt(2) / 2
@@ -1,10 +1,9 @@
-import sympy 
-import matplotlib 
-import random
+import numpy as np
+from arcs import Point
 
 
 class Ellipse():
-    def __init__(self, a, b, angle = 0, center = None, color = (0,0,0), width = 1600, height = 1600):
+    def __init__(self, a, b, angle = 0, center = None, color = (0,0,0), width = 1600, height = 1600, rng = None):
         self.a = a
         self.b = b
         self.angle = angle
@@ -12,19 +11,21 @@ class Ellipse():
         self.width = width
         self.height = height
         self.type = "Ellipse"
+        self.rng = np.random.default_rng(rng)
         if center:
-            self.center = center
+            self.center = Point(*center)
         else:
             self.center = self.createCenter()
 
     def createCenter(self):
         dist = max(self.a, self.b)
         # Ensure it will never be out of bounds by placing in inner rectangle
-        center = sympy.Point(random.randint(int(0 + dist), int(self.width - dist)),random.randint(int(0 + dist), int(self.height - dist)))
+        center = Point(int(self.rng.integers(int(0 + dist), int(self.width - dist), endpoint = True)),int(self.rng.integers(int(0 + dist), int(self.height - dist), endpoint = True)))
         return center
 
     def getDrawing(self):
-        return matplotlib.patches.Ellipse(self.center, self.a*2, self.b*2, angle = self.angle, color=self.color)
+        from matplotlib import patches
+        return patches.Ellipse(self.center, self.a*2, self.b*2, angle = self.angle, color=self.color)
 
     def getTitles(self):
         return ["Type", "a", "b", "Rotation", "Center"]
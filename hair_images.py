@@ -1,49 +1,137 @@
 import io
-import random
 import numpy as np
-import matplotlib.pyplot as plt
-from PIL import Image
-from scipy import ndimage
+from rasterizer import Rasterizer
+from metrics import Metrics
 
 
 class HairImage():
-    def __init__(self, width = 1600, height = 1600, dpi = 100):
+    # Convolution filter to blur and lighten thick dark lines 
+    # TODO: Experiment with smaller filters that may be more versatile for cases with thin lines
+    # Arbitrary but should add to slightly below 1 to lighten
+    defaultKernel = np.array([
+        [1/30, 1/25, 1/20, 1/20, 1/20],
+        [1/30, 1/25, 1/20, 1/20, 1/20],
+        [1/30, 1/25, 1/25, 1/20, 1/20],
+        [1/35, 1/30, 1/25, 1/25, 1/25],
+        [1/35, 1/35, 1/30, 1/30, 1/30]
+    ])
+
+    # Figures of finished images, by (width, height, dpi), kept to be reset and reused instead of rebuilt
+    figurePool = {}
+    figurePoolSize = 4
+
+    def __init__(self, width = 1600, height = 1600, dpi = 100, backend = "numpy", seed = None, kernel = None, blurPasses = 2, blurMethod = "auto", figure = True):
         self.width = width
         self.height = height
         self.dpi = dpi
-        self.setupImage()
+
+        # Blur stage, blurMethod is "direct", "separable", "fft" or "auto" to pick from the kernel
+        self.kernel = np.asarray(self.defaultKernel if kernel is None else kernel, dtype=np.float32)
+        self.blurPasses = blurPasses
+        self.blurMethod = blurMethod
+        self.buffers = []
+
+        # Randomness for blurLines and addNoise, an int seed or a numpy Generator such as RandomStreams.noise
+        self.rng = np.random.default_rng(seed)
+
+        # Stage timings of drawing and realify, for profiling slow runs
+        self.metrics = Metrics()
+
+        # "numpy" rasterizes shapes straight into an array, "matplotlib" draws patches and renders them for a preview
+        # "tiled" only keeps the shapes and renders them a tile at a time in writeTiles, for images too big to hold
+        self.backend = backend
+        if backend == "numpy":
+            self.rasterizer = Rasterizer(width, height, dpi)
+        elif backend == "tiled":
+            self.shapes = []
+        elif backend != "matplotlib":
+            raise Exception("Invalid backend")
+
+        # Without a figure only draw and process can be used, which never touch matplotlib
+        self.fig = None
+        if figure and backend != "tiled":
+            self.setupImage()
+        elif backend == "matplotlib":
+            raise Exception("The matplotlib backend needs a figure")
 
     def draw(self, shapes):
-        # Plot each arc on the figure
-        for shape in shapes:        
-            self.ax.add_patch(shape.getDrawing())
+        with self.metrics.stage("draw"):
+            if self.backend == "numpy":
+                self.rasterizer.draw(shapes)
+                return self.fig
+            if self.backend == "tiled":
+                self.shapes.extend(shapes)
+                return self.fig
 
-        plt.plot()
+            # Plot each arc on the figure
+            for shape in shapes:        
+                self.ax.add_patch(shape.getDrawing())
 
-        plt.gcf().set_size_inches(self.width/self.dpi, self.width/self.dpi)
         return self.fig
 
     def setupImage(self):
-        self.fig = plt.figure(figsize = (self.width/self.dpi, self.height/self.dpi), dpi = self.dpi, frameon = False)
+        # Take a figure of the same size from the pool when there is one
+        # Figures are made on their own Agg canvas rather than through pyplot, so they are never kept alive by it
+        pool = self.figurePool.get((self.width, self.height, self.dpi))
+        if pool:
+            self.fig, self.ax, self.display = pool.pop()
+            return
+
+        # matplotlib is only loaded by images that have a figure
+        import matplotlib.pyplot as plt
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        plt.style.use('grayscale')
+        self.fig = Figure(figsize = (self.width/self.dpi, self.height/self.dpi), dpi = self.dpi, frameon = False)
+        FigureCanvasAgg(self.fig)
 
         # Configure figure
         
-        self.ax = plt.Axes(self.fig, [0., 0., 1., 1.])
+        self.ax = self.fig.add_axes([0., 0., 1., 1.])
         
         self.ax.axis('off')
         self.ax.set_xlim(0, self.width)
         self.ax.set_ylim(0, self.height)
-        
-        self.fig.add_axes(self.ax)
-        
 
         # Remove blank padding around figure
         for item in [self.fig, self.ax]:
             item.patch.set_visible(False)
-        
-        plt.style.use('grayscale')
 
-    def realify(self, show = False, save = False):    
+        # Image that realify shows the result in, made on first use and then only given new data
+        self.display = None
+
+    def clearImage(self):
+        # Remove drawn shapes and hide the last result, leaving the figure as setupImage made it
+        for patch in list(self.ax.patches):
+            patch.remove()
+        if self.display is not None:
+            self.display.set_visible(False)
+
+    def close(self):
+        # Give the figure back to the pool, the HairImage can't be shown or saved after this
+        if self.fig is None:
+            return
+
+        self.clearImage()
+        pool = self.figurePool.setdefault((self.width, self.height, self.dpi), [])
+        if len(pool) < self.figurePoolSize:
+            pool.append((self.fig, self.ax, self.display))
+        self.fig = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def render(self):
+        if self.backend == "numpy":
+            return self.rasterizer.canvas
+        if self.backend == "tiled":
+            raise Exception("Tiled images can only be written with writeTiles")
+
+        from PIL import Image
         self.fig.canvas.draw()
 
         # Save figure to memory buffer
@@ -57,57 +145,184 @@ class HairImage():
         # Close buffer
         io_buf.close()
 
-        imgArray = np.array(im)
         # Turn image into Reverse Grayscale for easier convolutions
             # 255 is black, 0 is white
-        imgArray = [[255-val for val in row] for row in imgArray][::-1]
+        imgArray = np.empty((im.height, im.width), dtype=np.float32)
+        np.subtract(255, np.asarray(im)[::-1], out=imgArray)
+        return imgArray
+
+    def process(self):
+        # The realistic image as a float32 array in reverse grayscale, without displaying it
+        # The array is one of the blur buffers, so it is overwritten by the next call
+        with self.metrics.stage("render"):
+            imgArray = self.render()
+
+        # Convolve image for blurring
+        with self.metrics.stage("blur"):
+            blurred = self.blur(imgArray)
+        with self.metrics.stage("noise"):
+            blurred = self.blurLines(blurred)
+
+            blurred = self.addNoise(blurred)
+
+        return blurred
+
+    def realify(self, show = False, save = False):    
+        blurred = self.process()
 
         # Clear previous figure from canvas to make room for blurred
-        plt.draw()
-        plt.clf()
-
-        # Convolution filter to blur and lighten thick dark lines 
-        # TODO: Experiment with smaller filters that may be more versatile for cases with thin lines
-        # Arbitrary but should add to slightly below 1 to lighten
-        k = np.array([
-            [1/30, 1/25, 1/20, 1/20, 1/20],
-            [1/30, 1/25, 1/20, 1/20, 1/20],
-            [1/30, 1/25, 1/25, 1/20, 1/20],
-            [1/35, 1/30, 1/25, 1/25, 1/25],
-            [1/35, 1/35, 1/30, 1/30, 1/30]
-        ])
-
-        # Convolve image twice for blurring
-        blurred = ndimage.convolve(imgArray, k, mode='constant', cval=0.0)
-        blurred = ndimage.convolve(blurred, k, mode='constant', cval=0.0)
-        blurred = self.blurLines(blurred)
-        blurred = ndimage.convolve(imgArray, k, mode='constant', cval=0.0)
-        blurred = ndimage.convolve(blurred, k, mode='constant', cval=0.0)
-        blurred = self.blurLines(blurred)
-
-        blurred = self.addNoise(blurred)
-
-        plt.axis('off')
-
-        # Display image onto figure
-        plt.draw()
-
-        plt.imshow(blurred, origin='lower', cmap = "gray_r", vmin = 0, vmax = 255)
-        plt.draw()
+        self.clearImage()
+
+        # Display image onto figure, filling the axes so each array element is one pixel
+        with self.metrics.stage("display"):
+            if self.display is None:
+                self.display = self.ax.imshow(blurred, origin='lower', cmap = "gray_r", vmin = 0, vmax = 255, extent = (0, self.width, 0, self.height))
+            else:
+                self.display.set_data(blurred)
+            self.display.set_visible(True)
         
         if show:
+            # Only pyplot figures can be shown in a window
+            import matplotlib.pyplot as plt
+            plt.figure(figsize = (self.width/self.dpi, self.height/self.dpi), dpi = self.dpi, frameon = False)
+            plt.axis('off')
+            plt.imshow(blurred, origin='lower', cmap = "gray_r", vmin = 0, vmax = 255)
             plt.show()
         elif save:
-            plt.savefig("generatedImage.tiff", bbox_inches='tight', pad_inches=0)
+            self.fig.savefig("generatedImage.tiff", bbox_inches='tight', pad_inches=0)
         
         return self.fig
 
+    def getTile(self, x0, y0, x1, y1, boxes):
+        # Finished pixels of one tile, rasterized with a halo wide enough that blurring matches the whole image
+        # Outside the canvas there is nothing to draw, the same as the zero padding of a full size blur
+        halo = self.blurPasses * (max(self.kernel.shape) // 2 + 1)
+        rx0, ry0 = max(x0 - halo, 0), max(y0 - halo, 0)
+        rx1, ry1 = min(x1 + halo, self.width), min(y1 + halo, self.height)
+
+        rasterizer = Rasterizer(rx1 - rx0, ry1 - ry0, self.dpi, (rx0, ry0))
+        nearby = np.flatnonzero((boxes[:, 0] < rx1) & (boxes[:, 2] >= rx0) & (boxes[:, 1] < ry1) & (boxes[:, 3] >= ry0))
+        rasterizer.draw([self.shapes[i] for i in nearby])
+
+        tile = self.blur(rasterizer.canvas)[y0 - ry0:y1 - ry0, x0 - rx0:x1 - rx0].copy()
+        tile = self.addNoise(self.blurLines(tile))
+
+        return self.toPixels(tile)
+
+    @staticmethod
+    def toPixels(image):
+        # 8 bit grayscale of a reverse grayscale array from process, with row 0 at the top
+        # Dark lines on a light background with y pointing up, like the saved figure
+        return (255 - np.clip(image[::-1], 0, 255)).round().astype(np.uint8)
+
+    def getTiles(self, tileSize):
+        # Every tile of the 8 bit image in row major order from the top, with its row and column offsets
+        boxes = np.array([Rasterizer(0, 0, self.dpi).getBox(shape) for shape in self.shapes], dtype=np.float64).reshape(-1, 4)
+
+        for top in range(0, self.height, tileSize):
+            for left in range(0, self.width, tileSize):
+                bottom, right = min(top + tileSize, self.height), min(left + tileSize, self.width)
+                # Output rows count down from the top, canvas y counts up from the bottom
+                yield top, left, self.getTile(left, self.height - bottom, right, self.height - top, boxes)
+
+    def writeTiles(self, path, tileSize = 1024, compression = None):
+        # Stream the finished image to disk a tile at a time, memory only ever holds one tile and its halo
+        # A .npy path is written as a memory mapped array, a .tif or .tiff path as a tiled BigTIFF
+        with self.metrics.stage("tiles"):
+            if path.endswith(".npy"):
+                output = np.lib.format.open_memmap(path, mode = "w+", dtype = np.uint8, shape = (self.height, self.width))
+                for top, left, tile in self.getTiles(tileSize):
+                    output[top:top + tile.shape[0], left:left + tile.shape[1]] = tile
+                output.flush()
+                del output
+            elif path.endswith((".tif", ".tiff")):
+                try:
+                    import tifffile
+                except ImportError:
+                    raise Exception("Writing a BigTIFF needs the tifffile package, or use a .npy path")
+
+                # TIFF tiles are all the same size, so the ones on the right and bottom edges are padded
+                def paddedTiles():
+                    for top, left, tile in self.getTiles(tileSize):
+                        padded = np.zeros((tileSize, tileSize), dtype=np.uint8)
+                        padded[:tile.shape[0], :tile.shape[1]] = tile
+                        yield padded
+
+                tifffile.imwrite(path, paddedTiles(), shape = (self.height, self.width), dtype = np.uint8, tile = (tileSize, tileSize), bigtiff = True, compression = compression)
+            else:
+                raise Exception("Invalid tiled output, use .npy, .tif or .tiff")
+
+    def getBlurMethod(self):
+        if self.blurMethod != "auto":
+            return self.blurMethod
+
+        # Separable passes are cheaper than the full kernel only while the kernel has low rank
+        rows, cols = self.kernel.shape
+        rank = len(self.getKernelFactors())
+        if rank * (rows + cols) < rows * cols:
+            return "separable"
+        # FFT only pays off once the kernel gets large
+        if rows * cols > 121:
+            return "fft"
+        return "direct"
+
+    def getKernelFactors(self):
+        # Column and row vectors whose outer products add up to the kernel
+        u, s, vt = np.linalg.svd(self.kernel.astype(np.float64))
+        rank = max(int(np.sum(s > s[0] * 1e-6)), 1)
+        return [((u[:, i] * s[i]).astype(np.float32), vt[i].astype(np.float32)) for i in range(rank)]
+
+    def getBuffers(self, shape, count):
+        # Reuse float32 work buffers between images of the same size
+        if len(self.buffers) < count or self.buffers[0].shape != shape:
+            self.buffers = [np.empty(shape, dtype=np.float32) for i in range(count)]
+        return self.buffers[:count]
+
+    def blur(self, img):
+        # Run each pass once, alternating between two buffers so nothing else is allocated
+        from scipy import ndimage
+        method = self.getBlurMethod()
+        source = np.asarray(img, dtype=np.float32)
+        buffers = self.getBuffers(source.shape, 4 if method == "separable" else 2)
+
+        for i in range(self.blurPasses):
+            target = buffers[i % 2]
+
+            if method == "direct":
+                ndimage.convolve(source, self.kernel, output=target, mode='constant', cval=0.0)
+            elif method == "separable":
+                column, combined = buffers[2], buffers[3]
+                target.fill(0)
+                for colVector, rowVector in self.getKernelFactors():
+                    ndimage.convolve1d(source, colVector, axis=0, output=column, mode='constant', cval=0.0)
+                    ndimage.convolve1d(column, rowVector, axis=1, output=combined, mode='constant', cval=0.0)
+                    target += combined
+            elif method == "fft":
+                # scipy.signal takes over a second to import, so only the fft method loads it
+                # The full result is cropped around the same kernel center as ndimage, mode='same' shifts even sized kernels
+                from scipy import signal
+                rows, cols = self.kernel.shape
+                full = signal.fftconvolve(source, self.kernel, mode='full')
+                target[...] = full[rows // 2:rows // 2 + source.shape[0], cols // 2:cols // 2 + source.shape[1]]
+            else:
+                raise Exception("Invalid blur method")
+
+            source = target
+
+        return source
+
     def addNoise(self, img):
         # For all white pixels, assign random light gray shade
-        img = [[val if val > 50 else val/2+random.random()*30+20 for val in row] for row in img]
+        # Works in place on a float32 array
+        img = np.asarray(img, dtype=np.float32)
+        mask = img <= 50
+        img[mask] = img[mask]/2 + self.rng.random(np.count_nonzero(mask), dtype=np.float32)*30 + 20
         return img
 
     def blurLines(self, img):
         # Add randomness to dark gray/black pixels and lighten them
-        img = [[val/1.4-random.random()*40+25 if val > 80 else val for val in row] for row in img]
+        # Works in place on a float32 array
+        img = np.asarray(img, dtype=np.float32)
+        mask = img > 80
+        img[mask] = img[mask]/1.4 - self.rng.random(np.count_nonzero(mask), dtype=np.float32)*40 + 25
         return img
@@ -0,0 +1,75 @@
+import numpy as np
+from multiprocessing import Pool
+from arc_generation import CircularArcGenerator, EllipticalArcGenerator
+from hair_images import HairImage
+from random_streams import RandomStreams
+from shape_store import ShapeStore
+
+
+# Same settings and defaults as the batch_generation command line
+defaultSpec = {
+    "type": "circular",
+    "curvature": "0.005-0.02",
+    "eccentricity": "0-0.9",
+    "angle": "0-3.14",
+    "length": "100-300",
+    "minDist": 10,
+    "amount": 10,
+    "width": 800,
+    "height": 800,
+    "dpi": 100,
+    "batchSize": 1,
+    "placement": "pairwise",
+    "fieldResolution": 1,
+    "placementWorkers": 1,
+}
+
+def createPlacementPool(spec):
+    # One pool of placement workers shared by the generators of every image, None when placement isn't parallel
+    if spec["placement"] == "parallel" and spec["placementWorkers"] > 1:
+        return Pool(spec["placementWorkers"])
+    return None
+
+def createGenerator(spec, rng, placementPool = None):
+    # Arc generator for one image, placed arcs are drawn from rng
+    if spec["type"] == "circular":
+        generator = CircularArcGenerator(curvature = spec["curvature"], length = spec["length"], minDist = spec["minDist"], width = spec["width"], height = spec["height"], batchSize = spec["batchSize"], seed = rng, placement = spec["placement"])
+    elif spec["type"] == "elliptical":
+        generator = EllipticalArcGenerator(eccentricity = spec["eccentricity"], length = spec["length"], angle = spec["angle"], minDist = spec["minDist"], width = spec["width"], height = spec["height"], batchSize = spec["batchSize"], seed = rng, placement = spec["placement"])
+    else:
+        raise Exception("Invalid type")
+
+    generator.dpi = spec["dpi"]
+    generator.fieldResolution = spec["fieldResolution"]
+    generator.placementWorkers = spec["placementWorkers"]
+    generator.placementPool = placementPool
+    return generator
+
+def streamImages(spec = None, images = None, seed = None):
+    # Yields (image, shapes) one image at a time without writing files or making figures
+    # image is a float32 reverse grayscale array with row 0 at y = 0, shapes is a dict of columns like ShapeStore.getColumns
+    # images = None keeps going forever, and image i is the same as image i of a batch_generation run with the same seed
+    spec = dict(defaultSpec, **(spec or {}))
+    seeds = np.random.SeedSequence(seed)
+
+    # One image is reused so its canvas and blur buffers are only allocated once
+    img = HairImage(spec["width"], spec["height"], spec["dpi"], figure = False)
+    placementPool = createPlacementPool(spec)
+
+    try:
+        index = 0
+        while images is None or index < images:
+            streams = RandomStreams(int(seeds.spawn(1)[0].generate_state(1)[0]))
+            generator = createGenerator(spec, streams.geometry, placementPool)
+            generator.generateArcs(spec["amount"])
+
+            img.rasterizer.clear()
+            img.rng = streams.noise
+            img.draw(generator.arcSet)
+
+            yield img.process().copy(), ShapeStore.getColumns(generator.arcSet, index)
+            index += 1
+    finally:
+        if placementPool is not None:
+            placementPool.close()
+            placementPool.join()
@@ -0,0 +1,111 @@
+import datetime
+import json
+import os
+import queue
+import threading
+import numpy as np
+from hair_images import HairImage
+from main import writeShapeCsv
+from metrics import Metrics
+
+
+class ImageWriter():
+    # PIL names of the TIFF compressions that can be chosen
+    compressions = {"none": None, "lzw": "tiff_lzw", "deflate": "tiff_adobe_deflate", "packbits": "packbits"}
+
+    def __init__(self, folderName = "hairTests", queueSize = 8, threads = 1, compression = "none", shardSize = 0):
+        # Writes images and their shape data on background threads, so generation only waits when the queue is full
+        # With a shardSize, files go into numbered subfolders of at most that many images each
+        if compression not in self.compressions:
+            raise Exception("Invalid compression")
+        self.folderName = folderName
+        self.compression = compression
+        self.shardSize = shardSize
+        self.written = 0
+        self.error = None
+        self.lock = threading.Lock()
+
+        self.queue = queue.Queue(maxsize = queueSize)
+        self.threads = [threading.Thread(target = self.run, daemon = True) for i in range(threads)]
+        for thread in self.threads:
+            thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, image, shapes, fileName = None, metrics = None, index = None):
+        # image is a reverse grayscale array like HairImage.process gives, row 0 at y = 0
+        # The image is copied, so the caller can reuse its buffer straight away
+        # index picks the shard, so writers in different processes agree on it, otherwise images are counted
+        if self.error:
+            raise self.error
+        self.queue.put((np.array(image, dtype=np.float32), shapes, fileName, metrics, index))
+
+    def close(self):
+        # Wait for everything queued to be written, then stop the threads
+        for thread in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+
+        if self.error:
+            raise self.error
+
+    def run(self):
+        while True:
+            job = self.queue.get()
+            if job is None:
+                return
+
+            try:
+                self.save(*job)
+            except Exception as error:
+                self.error = self.error or error
+
+    def getFolder(self, index):
+        with self.lock:
+            index = self.written if index is None else index
+            self.written += 1
+
+        folderName = self.folderName
+        if self.shardSize:
+            folderName = os.path.join(folderName, f"{index // self.shardSize:04d}")
+        os.makedirs(folderName, exist_ok=True)
+        return folderName
+
+    def reserveName(self, folderName, fileName):
+        # Claim a name no other writer or process has used, by creating its tiff exclusively
+        if not fileName:
+            fileName = datetime.datetime.now().strftime("%y%m%d-%H%M%S-%f")
+
+        name, suffix = fileName, 0
+        while True:
+            try:
+                os.close(os.open(os.path.join(folderName, name + ".tiff"), os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return name
+            except FileExistsError:
+                suffix += 1
+                name = f"{fileName}-{suffix}"
+
+    def save(self, image, shapes, fileName, metrics, index):
+        # PIL is only loaded once something is written
+        from PIL import Image
+        metrics = metrics or Metrics()
+        with metrics.stage("save"):
+            folderName = self.getFolder(index)
+            fileName = self.reserveName(folderName, fileName)
+            path = os.path.join(folderName, fileName)
+
+            # Same look as the realify figure
+            Image.fromarray(HairImage.toPixels(image)).save(path + ".tiff", compression = self.compressions[self.compression])
+
+            # No shapes when they go to a ShapeStore instead
+            if shapes is not None:
+                writeShapeCsv(shapes, path + ".csv")
+
+        with open(path + ".json", "w") as file:
+            json.dump(metrics.toDict(), file, indent = 2)
@@ -2,6 +2,8 @@ from arcs import CircularArc, EllipticalArc
 from arc_generation import CircularArcGenerator, EllipticalArcGenerator
 from hair_images import HairImage
 from ellipses import Ellipse
+from arc_set import ArcSet
+from metrics import Metrics
 import os
 import datetime
 import csv
@@ -11,7 +13,17 @@ def millimetersToPixels(millimeters, dpi=100):
     # 1 inch = dpi*1 pixels
     return millimeters/25.4*dpi
 
-def saveShapeData(shapes, image, fileName = None):
+def writeShapeCsv(shapes, path):
+    # One row per shape under the titles of the first, the format loadShapeData reads
+    if not isinstance(shapes, (list, ArcSet)): # For Ellipse it will be element instead
+        shapes = [shapes]
+
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(shapes[0].getTitles())
+        writer.writerows([[*shape.printShape()] for shape in shapes])
+
+def saveShapeData(shapes, image, fileName = None, folderName = "hairTests", writeCsv = True, metrics = None):
     if not fileName:
         # Default fileName is date-time
         currentTime = datetime.datetime.now()
@@ -19,24 +31,18 @@ def saveShapeData(shapes, image, fileName = None):
         time = currentTime.strftime("%X").replace(":","")
         fileName = date + "-" + time
 
-    folderName = "hairTests"
+    # Create folder if it doesn't yet exist, other processes may be creating it too
+    os.makedirs(folderName, exist_ok=True)
 
-    # Create folder if it doesn't yet exist
-    if not os.path.exists(folderName):
-        os.makedirs(folderName)
-    
-    if type(shapes) != list: # For Ellipse it will be element instead
-        shapes = [shapes]
+    metrics = metrics or Metrics()
+    with metrics.stage("save"):
+        image.savefig(f"{folderName}/{fileName}.tiff", bbox_inches='tight', pad_inches=0)
 
-    csvTitles = shapes[0].getTitles()
-    csvInfo = [[*shape.printShape()] for shape in shapes]
+        if writeCsv:
+            writeShapeCsv(shapes, f"{folderName}/{fileName}.csv")
 
-    image.savefig(f"{folderName}/{fileName}.tiff", bbox_inches='tight', pad_inches=0)
-
-    with open(f"{folderName}/{fileName}.csv", 'w', newline='') as file:
-        writer = csv.writer(file)
-        writer.writerow(csvTitles)
-        writer.writerows(csvInfo)
+    # Stage timings and counters of the run that made this image, next to the image itself
+    metrics.save(f"{folderName}/{fileName}.json")
 
 def loadShapeData(filePath, width = 800, height = 800):
     with open(filePath, 'r') as csvFile:
@@ -89,7 +95,8 @@ if __name__ == "__main__":
         img = HairImage(width, height, 100)
         img.draw([ellipse])
         img.realify()
-        saveShapeData([ellipse], img.fig)
+        saveShapeData([ellipse], img.fig, metrics = img.metrics)
+        img.close()
     elif method in ["curves", "'curves'"]:
         methodType = input("Select arc type - 'Circular Arc', 'Elliptical Arc': ").lower()
         if methodType in ["circular arc", "'circular arc'"]:
@@ -110,7 +117,8 @@ if __name__ == "__main__":
             img = HairImage(width, height, 100)
             img.draw(generator.arcs)
             img.realify()
-            saveShapeData(generator.arcs, img.fig)
+            saveShapeData(generator.arcs, img.fig, metrics = generator.metrics.merge(img.metrics))
+            img.close()
         elif methodType in ["elliptical arc", "'elliptical arc'"]:
             print("For below properties give input as a float or a range separarated by a dash like 0-1")
             eccentricity = input("Enter eccentricity: ")
@@ -130,7 +138,8 @@ if __name__ == "__main__":
             img = HairImage(width, height, 100)
             img.draw(generator.arcs)
             img.realify()
-            saveShapeData(generator.arcs, img.fig)
+            saveShapeData(generator.arcs, img.fig, metrics = generator.metrics.merge(img.metrics))
+            img.close()
         else:
             raise Exception("Invalid type")            
     else:
@@ -0,0 +1,38 @@
+import json
+import time
+from contextlib import contextmanager
+
+
+class Metrics():
+    def __init__(self):
+        # Seconds spent in each stage and plain counters, both keyed by name and added up across calls
+        self.seconds = {}
+        self.counts = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0) + time.perf_counter() - start
+
+    def count(self, name, amount = 1):
+        self.counts[name] = self.counts.get(name, 0) + amount
+
+    def merge(self, *others):
+        # New Metrics with the totals of this one and the others, such as a generator's and an image's
+        merged = Metrics()
+        for metrics in (self,) + others:
+            for name, seconds in metrics.seconds.items():
+                merged.seconds[name] = merged.seconds.get(name, 0) + seconds
+            for name, amount in metrics.counts.items():
+                merged.count(name, amount)
+        return merged
+
+    def toDict(self):
+        return {"seconds": dict(self.seconds), "counts": dict(self.counts)}
+
+    def save(self, path):
+        with open(path, "w") as file:
+            json.dump(self.toDict(), file, indent = 2)
@@ -0,0 +1,13 @@
+import numpy as np
+
+
+class RandomStreams():
+    def __init__(self, seed = None):
+        # Independent streams for arc geometry and image noise, both derived from one seed
+        # With no seed, fresh entropy is drawn and kept in self.seed so the image can still be regenerated
+        sequence = np.random.SeedSequence(seed)
+        self.seed = sequence.entropy
+
+        geometrySequence, noiseSequence = sequence.spawn(2)
+        self.geometry = np.random.default_rng(geometrySequence)
+        self.noise = np.random.default_rng(noiseSequence)
@@ -0,0 +1,102 @@
+import math
+import numpy as np
+
+
+class Rasterizer():
+    def __init__(self, width = 1600, height = 1600, dpi = 100, origin = (0, 0)):
+        self.width = width
+        self.height = height
+        self.dpi = dpi
+
+        # Image coordinates of the canvas' corner pixel, so a canvas can be one tile of a larger image
+        self.origin = origin
+
+        # Reverse grayscale like HairImage.realify expects, 255 is black and 0 is white
+        # Row 0 is y = 0, so the canvas is already the right way up for origin='lower'
+        self.canvas = np.zeros((height, width), dtype=np.float32)
+
+    def clear(self):
+        self.canvas.fill(0)
+
+    def draw(self, shapes):
+        for shape in shapes:
+            if shape.type == "Ellipse":
+                self.drawEllipse(shape)
+            else:
+                self.drawArc(shape)
+        return self.canvas
+
+    def getBox(self, shape):
+        # Image coordinates (xmin, ymin, xmax, ymax) that drawing the shape can touch
+        if shape.type == "Ellipse":
+            c, s = math.cos(math.radians(shape.angle)), math.sin(math.radians(shape.angle))
+            halfWidth = math.sqrt((shape.a * c)**2 + (shape.b * s)**2) + 2
+            halfHeight = math.sqrt((shape.a * s)**2 + (shape.b * c)**2) + 2
+            return (shape.center.x - halfWidth, shape.center.y - halfHeight, shape.center.x + halfWidth, shape.center.y + halfHeight)
+        return shape.getBoundingBox(shape.getStrokeMargin(self.dpi) + 2)
+
+    def getInk(self, color):
+        # Darkness of a matplotlib style color, 1 for black and 0 for white
+        r, g, b = color[:3]
+        return 1 - (0.299*r + 0.587*g + 0.114*b)
+
+    def composite(self, coverage, ink, x0, y0):
+        # Paint over what is already there, like alpha blending a single ink color
+        region = self.canvas[y0:y0 + coverage.shape[0], x0:x0 + coverage.shape[1]]
+        region += (255 - region) * (coverage * ink)
+
+    def drawArc(self, arc):
+        halfWidth = arc.getStrokeMargin(self.dpi)
+        reach = math.ceil(halfWidth + 1)
+
+        # Sample densely enough that the nearest sample is practically the nearest point on the arc
+        divisions = int(4 * arc.length) + 2
+        _, xs, ys = arc.samplePoints(divisions, arc.theta1, arc.theta2)
+        gap = np.max(np.hypot(np.diff(xs), np.diff(ys)))
+        if gap > 0.25:
+            _, xs, ys = arc.samplePoints(int(divisions * gap / 0.25) + 2, arc.theta1, arc.theta2)
+        xs, ys = xs - self.origin[0], ys - self.origin[1]
+
+        x0, y0 = max(int(np.floor(xs.min())) - reach, 0), max(int(np.floor(ys.min())) - reach, 0)
+        x1, y1 = min(int(np.floor(xs.max())) + reach + 1, self.width), min(int(np.floor(ys.max())) + reach + 1, self.height)
+        if x0 >= x1 or y0 >= y1:
+            return
+
+        # Distance from every pixel center near the arc to its closest sample
+        offsets = np.arange(-reach, reach + 1)
+        px = (np.floor(xs).astype(np.int64)[:, None, None] + offsets[None, None, :]).repeat(len(offsets), axis=1)
+        py = (np.floor(ys).astype(np.int64)[:, None, None] + offsets[None, :, None]).repeat(len(offsets), axis=2)
+        dist = np.hypot(px + 0.5 - xs[:, None, None], py + 0.5 - ys[:, None, None])
+
+        inside = (px >= x0) & (px < x1) & (py >= y0) & (py < y1)
+        nearest = np.full((y1 - y0) * (x1 - x0), np.inf)
+        np.minimum.at(nearest, ((py[inside] - y0) * (x1 - x0) + px[inside] - x0), dist[inside])
+
+        # One pixel wide anti-aliasing ramp across the edge of the stroke, ends are rounded
+        coverage = np.clip(halfWidth + 0.5 - nearest, 0, 1).reshape(y1 - y0, x1 - x0).astype(np.float32)
+        self.composite(coverage, self.getInk(arc.color), x0, y0)
+
+    def drawEllipse(self, ellipse):
+        # Ellipse rotations are in degrees, the same as its matplotlib patch
+        c, s = math.cos(math.radians(ellipse.angle)), math.sin(math.radians(ellipse.angle))
+        halfWidth = math.sqrt((ellipse.a * c)**2 + (ellipse.b * s)**2)
+        halfHeight = math.sqrt((ellipse.a * s)**2 + (ellipse.b * c)**2)
+        cx, cy = float(ellipse.center.x) - self.origin[0], float(ellipse.center.y) - self.origin[1]
+
+        x0, y0 = max(int(cx - halfWidth) - 1, 0), max(int(cy - halfHeight) - 1, 0)
+        x1, y1 = min(int(cx + halfWidth) + 2, self.width), min(int(cy + halfHeight) + 2, self.height)
+        if x0 >= x1 or y0 >= y1:
+            return
+
+        # Pixel centers in the ellipse's own frame
+        x = np.arange(x0, x1) + 0.5 - cx
+        y = np.arange(y0, y1)[:, None] + 0.5 - cy
+        u, v = (c*x + s*y) / ellipse.a, (-s*x + c*y) / ellipse.b
+
+        # First order signed distance to the edge, F / |grad F| with F = sqrt(u^2 + v^2) - 1
+        radius = np.sqrt(u**2 + v**2)
+        gradient = np.hypot(u / ellipse.a, v / ellipse.b) / np.maximum(radius, 1e-12)
+        signedDist = (radius - 1) / np.maximum(gradient, 1e-12)
+
+        coverage = np.clip(0.5 - signedDist, 0, 1).astype(np.float32)
+        self.composite(coverage, self.getInk(ellipse.color), x0, y0)
@@ -0,0 +1,131 @@
+import os
+import json
+import numpy as np
+from arcs import CircularArc, EllipticalArc
+from ellipses import Ellipse
+from arc_set import ArcSet
+
+
+class ShapeStore():
+    # One raw binary file per column, so appending is a plain write and reading is a memory map
+    # Rotation is stored as the shape keeps it, radians for arcs and degrees for ellipses
+    columns = [
+        ("imageId", "<i8"),
+        ("type", "<i1"),
+        ("a", "<f8"),
+        ("b", "<f8"),
+        ("theta1", "<f8"),
+        ("theta2", "<f8"),
+        ("rotation", "<f8"),
+        ("cx", "<f8"),
+        ("cy", "<f8"),
+        ("length", "<f8"),
+        ("lw", "<f8"),
+    ]
+    types = ["Ellipse", "Circular Arc", "Elliptical Arc"]
+
+    def __init__(self, folderName):
+        self.folderName = folderName
+        os.makedirs(folderName, exist_ok=True)
+
+        schemaPath = os.path.join(folderName, "schema.json")
+        if not os.path.exists(schemaPath):
+            with open(schemaPath, "w") as file:
+                json.dump({"columns": self.columns, "types": self.types}, file)
+
+    def getPath(self, name):
+        return os.path.join(self.folderName, name + ".bin")
+
+    @classmethod
+    def getColumns(cls, shapes, imageId):
+        # Shapes of one image as one array per column, ellipses leave the arc only columns as nan
+        # A classmethod so worker processes can build rows without opening the store
+        if isinstance(shapes, ArcSet):
+            return cls.getArcSetColumns(shapes, imageId)
+        if type(shapes) != list: # For Ellipse it will be element instead
+            shapes = [shapes]
+
+        data = {name: np.full(len(shapes), np.nan, dtype=dtype) for name, dtype in cls.columns if dtype == "<f8"}
+        data["imageId"] = np.full(len(shapes), imageId, dtype="<i8")
+        data["type"] = np.array([cls.types.index(shape.type) for shape in shapes], dtype="<i1")
+
+        for i, shape in enumerate(shapes):
+            data["a"][i], data["b"][i], data["rotation"][i] = shape.a, shape.b, shape.angle
+            data["cx"][i], data["cy"][i] = shape.center.x, shape.center.y
+            if shape.type != "Ellipse":
+                data["theta1"][i], data["theta2"][i] = shape.theta1, shape.theta2
+                data["length"][i], data["lw"][i] = shape.length, shape.lw
+
+        return data
+
+    @classmethod
+    def getArcSetColumns(cls, arcSet, imageId):
+        # An ArcSet already holds its columns, so they are copied across without per arc objects
+        data = {name: getattr(arcSet, name).astype(dtype) for name, dtype in cls.columns if hasattr(arcSet, name)}
+        data["imageId"] = np.full(len(arcSet), imageId, dtype="<i8")
+        data["type"] = np.where(arcSet.circular, cls.types.index("Circular Arc"), cls.types.index("Elliptical Arc")).astype("<i1")
+        return data
+
+    def append(self, data):
+        # Accepts the output of getColumns, only one process should append at a time
+        # Columns are first cut back to the complete rows, so the partial row of an interrupted append
+        # is dropped instead of shifting everything written after it
+        rows = len(self)
+        for name, dtype in self.columns:
+            with open(self.getPath(name), "ab") as file:
+                file.truncate(rows * np.dtype(dtype).itemsize)
+                file.write(np.ascontiguousarray(data[name], dtype=dtype).tobytes())
+
+    def appendShapes(self, shapes, imageId):
+        self.append(self.getColumns(shapes, imageId))
+
+    def getNextId(self):
+        # One more than the largest image id stored, so a new batch can append without reusing ids
+        imageIds = self.load()["imageId"]
+        return int(imageIds.max()) + 1 if len(imageIds) else 0
+
+    def __len__(self):
+        # An interrupted append can leave columns uneven, only complete rows count
+        sizes = []
+        for name, dtype in self.columns:
+            path = self.getPath(name)
+            sizes.append(os.path.getsize(path) // np.dtype(dtype).itemsize if os.path.exists(path) else 0)
+        return min(sizes)
+
+    def load(self, mmap = True):
+        # Every column as an array, memory mapped unless mmap is False
+        rows = len(self)
+        data = {}
+
+        for name, dtype in self.columns:
+            if rows == 0:
+                data[name] = np.empty(0, dtype=dtype)
+            elif mmap:
+                data[name] = np.memmap(self.getPath(name), dtype=dtype, mode="r", shape=(rows,))
+            else:
+                data[name] = np.fromfile(self.getPath(name), dtype=dtype, count=rows)
+
+        return data
+
+    def loadShapes(self, imageId, width = 1600, height = 1600):
+        # Rebuild the shape objects of one image, lengths are stored so nothing is recomputed
+        data = self.load()
+        shapes = []
+
+        for i in np.flatnonzero(data["imageId"] == imageId):
+            shapeType = self.types[data["type"][i]]
+            a, b, angle = float(data["a"][i]), float(data["b"][i]), float(data["rotation"][i])
+            center = (float(data["cx"][i]), float(data["cy"][i]))
+
+            if shapeType == "Ellipse":
+                shapes.append(Ellipse(a, b, angle, center, width = width, height = height))
+                continue
+
+            theta1, theta2 = float(data["theta1"][i]), float(data["theta2"][i])
+            length, lw = float(data["length"][i]), float(data["lw"][i])
+            if shapeType == "Circular Arc":
+                shapes.append(CircularArc(a, theta1, theta2, center, angle, lw, width = width, height = height, length = length))
+            else:
+                shapes.append(EllipticalArc(a, b, theta1, theta2, angle, center, lw, width = width, height = height, length = length))
+
+        return shapes
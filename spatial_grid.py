@@ -0,0 +1,35 @@
+import math
+
+
+class SpatialGrid():
+    def __init__(self, cellSize):
+        # Uniform grid of square buckets, each holding the items whose bounding box touches it
+        self.cellSize = max(float(cellSize), 1)
+        self.cells = {}
+
+    def getCells(self, box):
+        xmin, ymin, xmax, ymax = box
+        i0, i1 = math.floor(xmin / self.cellSize), math.floor(xmax / self.cellSize)
+        j0, j1 = math.floor(ymin / self.cellSize), math.floor(ymax / self.cellSize)
+
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                yield (i, j)
+
+    def insert(self, item, box):
+        for cell in self.getCells(box):
+            self.cells.setdefault(cell, []).append((item, box))
+
+    def query(self, box):
+        # Return every item whose box overlaps the given box, each one only once
+        xmin, ymin, xmax, ymax = box
+        found = {}
+
+        for cell in self.getCells(box):
+            for item, (ixmin, iymin, ixmax, iymax) in self.cells.get(cell, []):
+                if id(item) in found:
+                    continue
+                if ixmin <= xmax and xmin <= ixmax and iymin <= ymax and ymin <= iymax:
+                    found[id(item)] = item
+
+        return list(found.values())
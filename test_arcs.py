@@ -0,0 +1,29 @@
+import math
+from arcs import EllipticalArc, ellipticE
+from arc_generation import EllipticalArcGenerator
+
+
+def test_distance_below_threshold_is_not_accepted():
+    # Facing arcs just under 10 pixels apart, where the search stops within its tolerance of the threshold
+    generator = EllipticalArcGenerator("0-0.5", "100-200", "0-3", 10, 400, 400, seed = 0)
+    for k in range(600):
+        gap = 9.990 + k * 0.0000166
+        first = EllipticalArc(50, 30, 2*math.pi - 0.3 + 0.0004*k, 2*math.pi + 0.3, 0, (200, 200))
+        second = EllipticalArc(40, 60, math.pi - 0.3, math.pi + 0.3 + 0.0004*k, 0, (290 + gap, 200))
+
+        distance, error = first.boundedMinimumDistance(second, threshold = 10)
+        assert distance - error <= gap
+        assert math.floor(generator.getDistance(first, second)) < generator.minDist
+
+def test_fast_distance_of_short_arcs():
+    # Short arcs used to keep their full range, and the search never ended
+    first = EllipticalArc(40, 40, 2*math.pi - 0.25, 2*math.pi + 0.25, 0, (200, 200))
+    second = EllipticalArc(40, 40, math.pi - 0.25, math.pi + 0.25, 0, (300, 200))
+
+    assert abs(first.fastMinimumDistance(second) - 20) < 0.1
+
+def test_elliptic_integral_of_flat_ellipse():
+    # m = 1 is an eccentricity of 1, where the Carlson forms divide by zero
+    for phi in [0.3, math.pi/2, 2.5, -4, 7]:
+        turns = round(phi / math.pi)
+        assert abs(ellipticE(phi, 1) - (math.sin(phi - turns*math.pi) + 2*turns)) < 1e-12
@@ -0,0 +1,39 @@
+import numpy as np
+from arcs import CircularArc
+from shape_store import ShapeStore
+
+
+def getShapes(count, offset = 0):
+    return [CircularArc(10 + offset + i, 0.5, 2, (100 + i, 200), width = 800, height = 800) for i in range(count)]
+
+def test_append_after_interrupted_append(tmp_path):
+    store = ShapeStore(str(tmp_path))
+    store.appendShapes(getShapes(2), 0)
+
+    # A crash part way through image 1, only its first two columns were written
+    data = ShapeStore.getColumns(getShapes(3, 10), 1)
+    for name, dtype in ShapeStore.columns[:2]:
+        with open(store.getPath(name), "ab") as file:
+            file.write(np.ascontiguousarray(data[name], dtype=dtype).tobytes())
+
+    store.appendShapes(getShapes(1, 90), 2)
+    assert len(store) == 3
+    assert store.loadShapes(1) == []
+    assert [shape.a for shape in store.loadShapes(0)] == [10, 11]
+    assert [shape.a for shape in store.loadShapes(2)] == [100]
+
+def test_append_second_batch(tmp_path):
+    store = ShapeStore(str(tmp_path))
+    for imageId in range(2):
+        store.appendShapes(getShapes(2, 10*imageId), imageId)
+
+    # A later batch continues after the ids already stored
+    nextStore = ShapeStore(str(tmp_path))
+    firstId = nextStore.getNextId()
+    for imageId in range(2):
+        nextStore.appendShapes(getShapes(3, 50 + 10*imageId), firstId + imageId)
+
+    assert firstId == 2
+    assert len(nextStore) == 10
+    assert [shape.a for shape in nextStore.loadShapes(0)] == [10, 11]
+    assert [shape.a for shape in nextStore.loadShapes(3)] == [70, 71, 72]